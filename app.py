@@ -1,262 +1,1287 @@
+import numpy as np
 import pandas as pd
 import dash
+import flask
 from dash import dcc, html
-from dash.dependencies import Input, Output
-import locale
+from dash.dependencies import ClientsideFunction, Input, Output, State
+import plotly.graph_objects as go
 from datetime import datetime
+from collections import OrderedDict, namedtuple
+import contextlib
+import cProfile
+import csv
+import functools
+import gzip
+import hashlib
+import io
 import os
+import pickle
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+import unicodedata
+from urllib.parse import parse_qs
 import pytz
+import requests
 
-# Configurar locale para formatação de números em português
 try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except locale.Error:
-    try:
-        locale.setlocale(locale.LC_ALL, 'Portuguese_Brazil.1252')
-    except locale.Error:
-        print("Atenção: Locale português não configurado. Os números serão formatados no padrão padrão.")
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos, cada processo busca a planilha
+    fcntl = None
+
+try:
+    import brotli
+except ImportError:  # opcional: sem o pacote brotli as respostas saem só em gzip
+    brotli = None
+
+# ==========================
+# FORMATAÇÃO DE NÚMEROS (pt-BR, sem depender do locale do processo)
+# ==========================
+# Formata no padrão en-US do Python e troca os separadores: 1,234.5 -> 1.234,5
+_TROCA_SEPARADORES = str.maketrans(",.", ".,")
 
+@functools.lru_cache(maxsize=4096)
 def formatar_numero(n):
     """Formata número inteiro com separador de milhar."""
     if pd.isna(n):
         return "N/A"
-    try:
-        return locale.format_string("%d", int(n), grouping=True)
-    except Exception:
-        return f"{int(n):,}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"{int(n):,}".translate(_TROCA_SEPARADORES)
+
+@functools.lru_cache(maxsize=4096)
+def formatar_percentual(x, casas=2):
+    """Formata uma fração como percentual: 0.1234 -> 12,34%."""
+    if pd.isna(x):
+        return "N/A"
+    return f"{x:,.{casas}%}".translate(_TROCA_SEPARADORES)
+
+def _formatar_vetor(valores, formatar):
+    # Cada valor distinto é formatado uma única vez
+    codigos, distintos = pd.factorize(pd.Series(valores), use_na_sentinel=True)
+    textos = np.array([formatar(v) for v in distintos.tolist()] + ["N/A"], dtype=object)
+    return textos[codigos].tolist()
+
+def formatar_numeros(valores):
+    """Versão vetorizada de formatar_numero para uma Series/array inteira."""
+    valores = pd.Series(valores)
+    if pd.api.types.is_float_dtype(valores):
+        # Mesmo truncamento de int(n), aplicado de uma vez
+        valores = np.trunc(valores)
+    return _formatar_vetor(valores, formatar_numero)
+
+def formatar_percentuais(valores, casas=2):
+    """Versão vetorizada de formatar_percentual para uma Series/array inteira."""
+    # Sem arredondar antes: cada valor distinto passa pela formatação escalar,
+    # e o resultado é idêntico ao de formatar_percentual (0.12345 -> 12,35%)
+    valores = pd.Series(valores, dtype="float64")
+    return _formatar_vetor(valores, functools.partial(formatar_percentual, casas=casas))
+
+# ==========================
+# INSTRUMENTAÇÃO (exportada em /metrics)
+# ==========================
+class Telemetria:
+    """Contadores e tempos acumulados do processo, no formato texto do Prometheus.
+
+    Cada worker do gunicorn tem os seus próprios valores.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}
+        # (nome, rótulos) -> [quantidade, soma, máximo]
+        self._tempos = {}
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def registrar_tempo(self, nome, segundos, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            tempo = self._tempos.setdefault(chave, [0, 0.0, 0.0])
+            tempo[0] += 1
+            tempo[1] += segundos
+            tempo[2] = max(tempo[2], segundos)
+
+    @contextlib.contextmanager
+    def medir(self, nome, **rotulos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, time.perf_counter() - inicio, **rotulos)
+
+    def cronometrado(self, nome, **rotulos):
+        """Decorador que registra o tempo de cada chamada da função."""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envoltorio(*args, **kwargs):
+                with self.medir(nome, **rotulos):
+                    return funcao(*args, **kwargs)
+            return envoltorio
+        return decorador
+
+    @staticmethod
+    def _rotulos(rotulos):
+        if not rotulos:
+            return ""
+        texto = ",".join(
+            '%s="%s"' % (chave, str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for chave, valor in rotulos
+        )
+        return "{" + texto + "}"
+
+    def exportar(self, medidores=()):
+        """Gera o texto do /metrics; medidores são tuplas (nome, rótulos, valor atual)."""
+        linhas = []
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            tempos = sorted(self._tempos.items())
+        tipos_vistos = set()
+        for (nome, rotulos), valor in contadores:
+            if nome not in tipos_vistos:
+                linhas.append(f"# TYPE {nome} counter")
+                tipos_vistos.add(nome)
+            linhas.append(f"{nome}{self._rotulos(rotulos)} {valor}")
+        # O máximo é outra métrica (gauge <nome>_max): vai em um bloco próprio
+        # depois do resumo, não intercalado com as linhas _count/_sum
+        maximos = {}
+        for (nome, rotulos), (quantidade, soma, maximo) in tempos:
+            if nome not in tipos_vistos:
+                linhas.append(f"# TYPE {nome} summary")
+                tipos_vistos.add(nome)
+            linhas.append(f"{nome}_count{self._rotulos(rotulos)} {quantidade}")
+            linhas.append(f"{nome}_sum{self._rotulos(rotulos)} {soma:.6f}")
+            maximos.setdefault(nome, []).append(f"{nome}_max{self._rotulos(rotulos)} {maximo:.6f}")
+        for nome, amostras in maximos.items():
+            linhas.append(f"# TYPE {nome}_max gauge")
+            linhas.extend(amostras)
+        # As amostras de cada métrica precisam ficar juntas no texto
+        for nome, rotulos, valor in sorted(medidores, key=lambda medidor: medidor[0]):
+            if nome not in tipos_vistos:
+                linhas.append(f"# TYPE {nome} gauge")
+                tipos_vistos.add(nome)
+            linhas.append(f"{nome}{self._rotulos(sorted(rotulos.items()))} {valor}")
+        return "\n".join(linhas) + "\n"
+
+telemetria = Telemetria()
 
 # ==========================
 # LINK CSV DO GOOGLE SHEETS
 # ==========================
-URL_SHEETS = "https://docs.google.com/spreadsheets/d/e/2PACX-1vRRoTZ50By6BN1ThLry1WykGR57GTaH5pmvBZUxLqU2gnBV3qUZGlBFk4FkMaSAUw/pub?gid=1684851949&single=true&output=csv"
+URL_SHEETS = os.environ.get(
+    "URL_SHEETS",
+    "https://docs.google.com/spreadsheets/d/e/2PACX-1vRRoTZ50By6BN1ThLry1WykGR57GTaH5pmvBZUxLqU2gnBV3qUZGlBFk4FkMaSAUw/pub?gid=1684851949&single=true&output=csv"
+)
+
+# ==========================
+# FONTES (uma planilha publicada por campanha/região)
+# ==========================
+# FONTES_PLANILHAS="nome=url nome2=url2" (separadas por espaço ou quebra de
+# linha); a primeira é a padrão. Sem a variável, há uma única fonte
+# "principal" com URL_SHEETS. O navegador escolhe a fonte com ?fonte=nome.
+def ler_fontes(texto, url_padrao):
+    """Registro ordenado nome -> URL das planilhas a partir de FONTES_PLANILHAS."""
+    fontes = {}
+    for item in (texto or "").split():
+        nome, separador, url = item.partition("=")
+        if not separador or not url:
+            raise ValueError(f"Fonte inválida em FONTES_PLANILHAS: {item!r} (use nome=url)")
+        # O nome aparece em URLs e nomes de arquivo
+        if not nome.replace("-", "").replace("_", "").isalnum():
+            raise ValueError(f"Nome de fonte inválido: {nome!r} (use letras, números, - e _)")
+        fontes[nome] = url
+    return fontes or {"principal": url_padrao}
+
+FONTES = ler_fontes(os.environ.get("FONTES_PLANILHAS"), URL_SHEETS)
+FONTE_PADRAO = next(iter(FONTES))
+
+# ==========================
+# ESQUEMA DAS COLUNAS DA PLANILHA
+# ==========================
+# Cada coluna do dataframe final com os títulos aceitos na planilha (comparados
+# sem acentos, maiúsculas ou espaços extras), o tipo e, para títulos repetidos
+# como "UNIDADES", qual ocorrência (0 = primeira) corresponde à coluna.
+Coluna = namedtuple("Coluna", ["nome", "aliases", "tipo", "ocorrencia"], defaults=[0])
+
+ESQUEMA_PLANILHA = [
+    # --------------------------- COLUNAS PRINCIPAIS ---------------------------
+    Coluna("nome", ["NOME"], "texto"),
+    Coluna("qtd_convites", ["QUANTIDADE DE CONVITES"], "contagem"),
+    Coluna("meta_convites", ["META", "META DE CONVITES"], "contagem"),
+    Coluna("progresso_convites", ["PROGRESSO DE CONVITES"], "taxa"),
+    Coluna("confirmados", ["CONFIRMADOS"], "contagem"),
+    Coluna("meta_confirmados", ["META DE CONFIRMADOS"], "contagem"),
+    Coluna("media_confirmados", ["MÉDIA DE CONFIRMADOS"], "taxa"),
+    Coluna("ligacoes_efetuadas", ["LIGAÇÕES EFETUADAS"], "contagem"),
+    Coluna("confirmacoes_ligacoes", ["CONFIRMAÇÕES"], "contagem"),
+    # --------------------------- TOP 10 MAIS CONVITES --------------------------
+    Coluna("vendedor_top_convites", ["VENDEDORES QUE ENVIARAM MAIS CONVITES"], "texto"),
+    Coluna("unidade_top_convites", ["UNIDADES"], "texto", 0),
+    Coluna("qtd_top_convites", ["CONVITES"], "contagem"),
+    # ----------------- TOP 10 COM CONVITES CONFIRMADOS -------------------------
+    Coluna("vendedor_confirmado", ["VENDEDORES QUE TIVERAM MAIS CONFIRMAÇÕES"], "texto"),
+    Coluna("unidade_confirmado", ["UNIDADES"], "texto", 1),
+    Coluna("convites_confirmados", ["CONVITES CONFIRMADOS"], "contagem"),
+]
+
+# Colunas esperadas no dataframe final
+COLUNAS_ESPERADAS = [coluna.nome for coluna in ESQUEMA_PLANILHA]
+
+def _normalizar_cabecalho(titulo):
+    """Remove acentos, espaços extras e diferenças de maiúsculas de um título."""
+    sem_acentos = unicodedata.normalize("NFKD", str(titulo)).encode("ascii", "ignore").decode()
+    return " ".join(sem_acentos.upper().split())
+
+# Esquema compilado: (título normalizado, ocorrência) -> coluna do esquema
+_TABELA_ESQUEMA = {
+    (_normalizar_cabecalho(alias), coluna.ocorrencia): coluna
+    for coluna in ESQUEMA_PLANILHA
+    for alias in coluna.aliases
+}
+
+class ErroDados(Exception):
+    """Planilha indisponível ou em formato inválido."""
+
+@functools.lru_cache(maxsize=32)
+def mapear_cabecalho(cabecalho):
+    """Associa as posições de um cabeçalho (tupla de títulos) às colunas do esquema.
+
+    Retorna uma tupla de pares (posição, Coluna) na ordem da planilha. Levanta
+    ErroDados listando as colunas do esquema que não foram encontradas.
+    """
+    ocorrencias = {}
+    encontradas = {}
+    for posicao, titulo in enumerate(cabecalho):
+        chave = _normalizar_cabecalho(titulo)
+        ocorrencia = ocorrencias.get(chave, 0)
+        ocorrencias[chave] = ocorrencia + 1
+        coluna = _TABELA_ESQUEMA.get((chave, ocorrencia))
+        if coluna is not None and coluna.nome not in encontradas:
+            encontradas[coluna.nome] = (posicao, coluna)
+
+    faltantes = [nome for nome in COLUNAS_ESPERADAS if nome not in encontradas]
+    if faltantes:
+        raise ErroDados(f"Planilha sem as colunas esperadas: {', '.join(faltantes)}")
+    return tuple(sorted(encontradas.values()))
+
+# Tempo máximo (em segundos) de espera pela resposta do Google Sheets
+TIMEOUT_PLANILHA_SEGUNDOS = float(os.environ.get("TIMEOUT_PLANILHA_SEGUNDOS", 30))
+# Tempo máximo para abrir a conexão (falha rápido se o host não responde)
+TIMEOUT_CONEXAO_SEGUNDOS = float(os.environ.get("TIMEOUT_CONEXAO_SEGUNDOS", 5))
+
+def _criar_sessao(conexoes):
+    """Sessão HTTP com keep-alive compartilhada pelas buscas de todas as fontes."""
+    sessao = requests.Session()
+    adaptador = requests.adapters.HTTPAdapter(pool_connections=conexoes, pool_maxsize=conexoes)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    return sessao
+
+# Um pool por processo, com uma conexão por fonte (as fontes são buscadas em paralelo)
+sessao_http = _criar_sessao(max(len(FONTES), 1))
+
+# conteudo é None quando o servidor responde 304 (planilha não mudou)
+RespostaPlanilha = namedtuple("RespostaPlanilha", ["conteudo", "etag", "last_modified"])
+
+def baixar_planilha(url, etag=None, last_modified=None, fonte=FONTE_PADRAO):
+    """Baixa o CSV bruto com requisição condicional (If-None-Match / If-Modified-Since)."""
+    with telemetria.medir("dashboard_planilha_download_segundos", fonte=fonte):
+        return _baixar_planilha(url, etag, last_modified, fonte)
+
+def _baixar_planilha(url, etag, last_modified, fonte):
+    if not url.startswith(("http://", "https://")):
+        # Caminho local (útil para testes e execução offline)
+        try:
+            with open(url, "rb") as f:
+                conteudo = f.read()
+        except OSError as e:
+            telemetria.incrementar("dashboard_planilha_buscas_total", fonte=fonte, resultado="erro")
+            raise ErroDados(f"Erro ao ler Google Sheets: {e}") from e
+        telemetria.incrementar("dashboard_planilha_buscas_total", fonte=fonte, resultado="200")
+        telemetria.incrementar("dashboard_planilha_bytes_total", len(conteudo), fonte=fonte)
+        return RespostaPlanilha(conteudo, None, None)
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        resposta = sessao_http.get(
+            url, headers=headers, timeout=(TIMEOUT_CONEXAO_SEGUNDOS, TIMEOUT_PLANILHA_SEGUNDOS)
+        )
+        if resposta.status_code == 304:
+            telemetria.incrementar("dashboard_planilha_buscas_total", fonte=fonte, resultado="304")
+            return RespostaPlanilha(None, etag, last_modified)
+        resposta.raise_for_status()
+    except requests.RequestException as e:
+        telemetria.incrementar("dashboard_planilha_buscas_total", fonte=fonte, resultado="erro")
+        raise ErroDados(f"Erro ao ler Google Sheets: {e}") from e
+    telemetria.incrementar("dashboard_planilha_buscas_total", fonte=fonte, resultado=str(resposta.status_code))
+    telemetria.incrementar("dashboard_planilha_bytes_total", len(resposta.content), fonte=fonte)
+    return RespostaPlanilha(
+        resposta.content,
+        resposta.headers.get("ETag"),
+        resposta.headers.get("Last-Modified"),
+    )
 
 # ==========================
 # FUNÇÃO PARA CARREGAR DADOS
 # ==========================
-def carregar_dados():
+def _inteiro_compacto(valores):
+    """Menor tipo inteiro que comporta todos os valores."""
+    if len(valores) == 0:
+        return np.int8
+    minimo, maximo = valores.min(), valores.max()
+    for tipo in (np.int8, np.int16, np.int32):
+        limites = np.iinfo(tipo)
+        if limites.min <= minimo and maximo <= limites.max:
+            return tipo
+    return np.int64
+
+@telemetria.cronometrado("dashboard_planilha_interpretacao_segundos")
+def interpretar_planilha(conteudo):
+    """Normaliza e valida o CSV bruto da planilha. Levanta ErroDados se for inválido.
+
+    Só as colunas do esquema são lidas; nomes de unidades e vendedores viram
+    categorias (na ordem em que aparecem), contagens viram o menor tipo
+    inteiro possível e taxas float32.
+    """
+    try:
+        cabecalho = next(csv.reader(io.StringIO(conteudo.decode("utf-8-sig"))), [])
+    except UnicodeDecodeError as e:
+        raise ErroDados(f"Erro ao ler Google Sheets: {e}") from e
+    mapa = mapear_cabecalho(tuple(cabecalho))
+
     try:
-        df_temp = pd.read_csv(URL_SHEETS, header=0)
+        df_temp = pd.read_csv(
+            io.BytesIO(conteudo), header=None, skiprows=1,
+            usecols=[posicao for posicao, _ in mapa],
+            dtype={posicao: "str" for posicao, coluna in mapa if coluna.tipo == "texto"},
+        )
     except Exception as e:
-        print(f"Erro ao ler Google Sheets: {e}")
-        return pd.DataFrame(columns=[
-            "nome","qtd_convites","meta_convites","progresso_convites",
-            "confirmados","meta_confirmados","media_confirmados",
-            "ligacoes_efetuadas","confirmacoes_ligacoes",
-            "vendedor_top_convites","unidade_top_convites","qtd_top_convites",
-            "vendedor_confirmado","unidade_confirmado","convites_confirmados"
-        ])
+        raise ErroDados(f"Erro ao ler Google Sheets: {e}") from e
 
-    # Normaliza os nomes das colunas
-    cols_lower = [c.strip().upper() for c in df_temp.columns]
-    header_map = {}
+    # Linhas sem nome são descartadas antes de qualquer conversão
+    posicao_nome = next(posicao for posicao, coluna in mapa if coluna.nome == "nome")
+    df_temp = df_temp[df_temp[posicao_nome].notna()]
+    if df_temp.empty:
+        raise ErroDados("Planilha sem nenhuma unidade")
 
-    # --------------------------- COLUNAS PRINCIPAIS ---------------------------
-    if "NOME" in cols_lower:
-        header_map[list(df_temp.columns)[cols_lower.index("NOME")]] = "nome"
-    if "QUANTIDADE DE CONVITES" in cols_lower:
-        header_map[list(df_temp.columns)[cols_lower.index("QUANTIDADE DE CONVITES")]] = "qtd_convites"
-    if "META" in cols_lower:
-        header_map[list(df_temp.columns)[cols_lower.index("META")]] = "meta_convites"
-    if "PROGRESSO DE CONVITES" in cols_lower:
-        header_map[list(df_temp.columns)[cols_lower.index("PROGRESSO DE CONVITES")]] = "progresso_convites"
-    if "CONFIRMADOS" in cols_lower:
-        header_map[list(df_temp.columns)[cols_lower.index("CONFIRMADOS")]] = "confirmados"
-    if "META DE CONFIRMADOS" in cols_lower:
-        header_map[list(df_temp.columns)[cols_lower.index("META DE CONFIRMADOS")]] = "meta_confirmados"
-    if "MÉDIA DE CONFIRMADOS" in cols_lower or "MEDIA DE CONFIRMADOS" in cols_lower:
-        idx = cols_lower.index("MÉDIA DE CONFIRMADOS") if "MÉDIA DE CONFIRMADOS" in cols_lower else cols_lower.index("MEDIA DE CONFIRMADOS")
-        header_map[list(df_temp.columns)[idx]] = "media_confirmados"
-    if "LIGAÇÕES EFETUADAS" in cols_lower or "LIGACOES EFETUADAS" in cols_lower:
-        idx = cols_lower.index("LIGAÇÕES EFETUADAS") if "LIGAÇÕES EFETUADAS" in cols_lower else cols_lower.index("LIGACOES EFETUADAS")
-        header_map[list(df_temp.columns)[idx]] = "ligacoes_efetuadas"
-    if "CONFIRMAÇÕES" in cols_lower or "CONFIRMACOES" in cols_lower:
-        idx = cols_lower.index("CONFIRMAÇÕES") if "CONFIRMAÇÕES" in cols_lower else cols_lower.index("CONFIRMACOES")
-        header_map[list(df_temp.columns)[idx]] = "confirmacoes_ligacoes"
+    # Converte textos em categorias e números em tipos compactos, montando o
+    # DataFrame final de uma só vez a partir dos arrays
+    colunas = {}
+    for posicao, coluna in mapa:
+        serie = df_temp[posicao]
+        if coluna.tipo == "texto":
+            # factorize sem ordenar evita o custo de ordenar milhares de nomes únicos
+            codigos, categorias = pd.factorize(serie, sort=False)
+            colunas[coluna.nome] = pd.Categorical.from_codes(codigos, categorias, validate=False)
+            continue
+        if not pd.api.types.is_numeric_dtype(serie):
+            serie = pd.to_numeric(serie, errors='coerce')
+        valores = np.nan_to_num(serie.to_numpy(dtype='float64'), nan=0.0)
+        if coluna.tipo == "contagem":
+            colunas[coluna.nome] = np.trunc(valores).astype(_inteiro_compacto(valores))
+        else:
+            colunas[coluna.nome] = valores.astype('float32')
 
-    # --------------------------- TOP 10 MAIS CONVITES --------------------------
-    if "VENDEDORES QUE ENVIARAM MAIS CONVITES" in cols_lower:
-        idx = cols_lower.index("VENDEDORES QUE ENVIARAM MAIS CONVITES")
-        header_map[list(df_temp.columns)[idx]] = "vendedor_top_convites"
-    if "UNIDADES" in cols_lower:
-        idx = cols_lower.index("UNIDADES")
-        header_map[list(df_temp.columns)[idx]] = "unidade_top_convites"
-    if "CONVITES" in cols_lower:
-        idx = cols_lower.index("CONVITES")
-        header_map[list(df_temp.columns)[idx]] = "qtd_top_convites"
+    return pd.DataFrame({nome: colunas[nome] for nome in COLUNAS_ESPERADAS})
 
-    # ----------------- TOP 10 COM CONVITES CONFIRMADOS -------------------------
-    if "VENDEDORES QUE TIVERAM MAIS CONFIRMAÇÕES" in cols_lower:
-        idx = cols_lower.index("VENDEDORES QUE TIVERAM MAIS CONFIRMAÇÕES")
-        header_map[list(df_temp.columns)[idx]] = "vendedor_confirmado"
-    if "UNIDADES" in cols_lower:
-        # Aqui precisamos mapear essa UNIDADE para o ranking de confirmados também
-        header_map[list(df_temp.columns)[idx]] = "unidade_confirmado"
-    if "CONVITES CONFIRMADOS" in cols_lower:
-        idx = cols_lower.index("CONVITES CONFIRMADOS")
-        header_map[list(df_temp.columns)[idx]] = "convites_confirmados"
-
-    # Renomear colunas
-    if header_map:
-        df_temp = df_temp.rename(columns=header_map)
-
-    # Colunas esperadas no dataframe final
-    expected_cols = [
-        "nome","qtd_convites","meta_convites","progresso_convites",
-        "confirmados","meta_confirmados","media_confirmados",
-        "ligacoes_efetuadas","confirmacoes_ligacoes",
-        "vendedor_top_convites","unidade_top_convites","qtd_top_convites",
-        "vendedor_confirmado","unidade_confirmado","convites_confirmados"
-    ]
+# ==========================
+# MÉTRICAS DERIVADAS (calculadas uma vez por versão dos dados)
+# ==========================
+Metricas = namedtuple("Metricas", [
+    "total_convites", "meta_convites", "total_confirmados", "meta_confirmados",
+    "total_ligacoes", "progresso_geral", "taxa_confirmacao",
+    "melhor_unidade", "valor_melhor_unidade", "unidades",
+    "top5_confirmacoes", "bottom5_convites", "top5_convites",
+    "bottom5_confirmados", "top10_convites", "top10_confirmados",
+    "detalhes_unidades",
+])
+
+# Campos usados pelos cards de detalhe da unidade
+COLUNAS_DETALHE = [
+    "nome", "progresso_convites", "confirmados", "qtd_convites", "media_confirmados",
+    "meta_confirmados", "ligacoes_efetuadas", "confirmacoes_ligacoes",
+]
+
+def _ranking(df, coluna, n, colunas, maiores=True):
+    """Retorna as n linhas com maior (ou menor) valor em coluna como lista de dicts."""
+    selecao = df.nlargest(n, coluna) if maiores else df.nsmallest(n, coluna)
+    return selecao[colunas].to_dict('records')
+
+@telemetria.cronometrado("dashboard_metricas_calculo_segundos")
+def calcular_metricas(df):
+    """Calcula os KPIs globais e todos os rankings do dashboard de uma só vez."""
+    total_convites = float(df['qtd_convites'].sum())
+    meta_convites = float(df['meta_convites'].sum())
+    total_confirmados = float(df['confirmados'].sum())
+    meta_confirmados = float(df['meta_confirmados'].sum())
+    total_ligacoes = float(df['ligacoes_efetuadas'].sum())
+
+    if df.empty:
+        return Metricas(
+            total_convites, meta_convites, total_confirmados, meta_confirmados,
+            total_ligacoes, 0, 0, "N/A", 0, [], [], [], [], [], [], [],
+            df[COLUNAS_DETALHE]
+        )
+
+    loja_mais_confirmacoes = df.loc[df['confirmacoes_ligacoes'].idxmax()]
+    return Metricas(
+        total_convites=total_convites,
+        meta_convites=meta_convites,
+        total_confirmados=total_confirmados,
+        meta_confirmados=meta_confirmados,
+        total_ligacoes=total_ligacoes,
+        progresso_geral=(total_convites / meta_convites) if meta_convites > 0 else 0,
+        taxa_confirmacao=(total_confirmados / total_convites) if total_convites > 0 else 0,
+        melhor_unidade=loja_mais_confirmacoes['nome'],
+        valor_melhor_unidade=loja_mais_confirmacoes['confirmacoes_ligacoes'],
+        unidades=list(df['nome'].unique()),
+        top5_confirmacoes=_ranking(df, 'confirmacoes_ligacoes', 5, ['nome', 'confirmacoes_ligacoes']),
+        bottom5_convites=_ranking(df, 'qtd_convites', 5, ['nome', 'qtd_convites'], maiores=False),
+        top5_convites=_ranking(df, 'qtd_convites', 5, ['nome', 'qtd_convites']),
+        bottom5_confirmados=_ranking(df, 'confirmados', 5, ['nome', 'confirmados'], maiores=False),
+        top10_convites=_ranking(
+            df, 'qtd_top_convites', 10,
+            ['vendedor_top_convites', 'unidade_top_convites', 'qtd_top_convites']
+        ),
+        top10_confirmados=_ranking(
+            df, 'convites_confirmados', 10,
+            ['vendedor_confirmado', 'unidade_confirmado', 'convites_confirmados']
+        ),
+        # Uma linha por unidade (a primeira ocorrência vence, como no .iloc[0])
+        detalhes_unidades=df.drop_duplicates('nome')[COLUNAS_DETALHE],
+    )
+
+# Snapshot imutável: dados, métricas derivadas e versão trocados juntos.
+# `erro`/`erro_em` marcam a última busca que falhou: a falha faz parte da
+# versão (e do arquivo compartilhado), então todos os workers e clientes a veem
+Snapshot = namedtuple(
+    "Snapshot", ["df", "metricas", "versao", "atualizado_em", "erro", "erro_em"],
+    defaults=[None, None]
+)
+
+def _snapshot_vazio():
+    df = pd.DataFrame(columns=COLUNAS_ESPERADAS)
+    return Snapshot(df, calcular_metricas(df), 0, None)
+
+# ==========================
+# CACHE DO SNAPSHOT DE DADOS
+# ==========================
+# Tempo (em segundos) que um snapshot carregado da planilha continua válido.
+# O atualizador em segundo plano busca a planilha novamente nesse intervalo.
+CACHE_TTL_SEGUNDOS = float(os.environ.get("CACHE_TTL_SEGUNDOS", 5 * 60))
+# Desative (ATUALIZADOR_ATIVO=0) para buscar a planilha somente sob demanda
+ATUALIZADOR_ATIVO = os.environ.get("ATUALIZADOR_ATIVO", "1") != "0"
+
+FUSO_HORARIO = pytz.timezone("America/Sao_Paulo")
+
+# Diretório local onde o snapshot é compartilhado entre os workers do gunicorn.
+# O snapshot é lido com pickle: o diretório precisa ser só do usuário do app
+# (o padrão tem o uid no nome e é criado com permissão 0700)
+DIRETORIO_DADOS = os.environ.get(
+    "DIRETORIO_DADOS",
+    os.path.join(tempfile.gettempdir(), f"dashboard-primavia-{getattr(os, 'getuid', lambda: 0)()}")
+)
+
+def _dono_e_o_processo(st):
+    # Sem uid (Windows), o diretório temporário já é do usuário
+    return not hasattr(os, "getuid") or st.st_uid == os.getuid()
+
+def preparar_diretorio_privado(diretorio):
+    """Cria o diretório com permissão 0700 e recusa um que seja de outro usuário.
+
+    Em /tmp compartilhado, outro usuário poderia criar o diretório antes e
+    plantar um snapshot que o app executaria ao fazer o pickle.load.
+    """
+    os.makedirs(diretorio, mode=0o700, exist_ok=True)
+    st = os.lstat(diretorio)
+    if (
+        not stat.S_ISDIR(st.st_mode)
+        or not _dono_e_o_processo(st)
+        or (hasattr(os, "getuid") and st.st_mode & 0o022)
+    ):
+        raise RuntimeError(
+            f"{diretorio} não é um diretório exclusivo deste usuário (dono, link ou "
+            "permissão de escrita para outros); use outro DIRETORIO_DADOS"
+        )
+# Intervalo (em segundos) com que os workers que não buscam a planilha
+# verificam se há um snapshot novo em disco
+INTERVALO_SINCRONIZACAO_SEGUNDOS = float(os.environ.get("INTERVALO_SINCRONIZACAO_SEGUNDOS", 5))
+# Espera entre tentativas de uma fonte que está falhando: começa em
+# BACKOFF_INICIAL_SEGUNDOS e dobra a cada falha seguida, até BACKOFF_MAXIMO_SEGUNDOS
+BACKOFF_INICIAL_SEGUNDOS = float(os.environ.get("BACKOFF_INICIAL_SEGUNDOS", 30))
+BACKOFF_MAXIMO_SEGUNDOS = float(os.environ.get("BACKOFF_MAXIMO_SEGUNDOS", 30 * 60))
+# Versão do formato do arquivo de snapshot; aumente ao mudar os campos gravados
+# ou os tipos das colunas, e arquivos antigos serão ignorados na leitura
+VERSAO_FORMATO_SNAPSHOT = 1
+# O pickle de um DataFrame depende da versão do pandas (requirements.txt não
+# fixa versões): ela entra no nome dos arquivos, então processos com pandas
+# diferentes (um deploy em andamento) elegem líderes e gravam arquivos próprios
+FORMATO_SNAPSHOT = f"f{VERSAO_FORMATO_SNAPSHOT}-pandas{pd.__version__}"
+# Falhas seguidas ao gravar o snapshot (disco cheio, permissão) depois das
+# quais o líder cede a liderança para outro worker tentar
+MAXIMO_FALHAS_GRAVACAO = int(os.environ.get("MAXIMO_FALHAS_GRAVACAO", 3))
+
+class ArmazemSnapshot:
+    """Snapshot compartilhado entre processos através de um arquivo em disco local.
+
+    Apenas o processo que obtém o lock exclusivo (flock) do arquivo de lock, o
+    "líder", baixa a planilha e grava o snapshot; os demais só recarregam o
+    arquivo quando ele muda. Se o líder morrer, o lock é liberado pelo sistema
+    operacional e outro processo assume. A gravação é atômica (arquivo
+    temporário + os.replace), então um leitor nunca vê um arquivo pela metade.
+    O arquivo também é o último snapshot válido lido na inicialização do
+    processo (warm start): com DIRETORIO_DADOS em disco persistente, o app
+    volta a servir dados logo após um deploy, mesmo sem acesso à planilha.
+    """
+
+    def __init__(self, diretorio, nome):
+        preparar_diretorio_privado(diretorio)
+        self.caminho = os.path.join(diretorio, f"{nome}.{FORMATO_SNAPSHOT}.pkl")
+        self._caminho_lock = os.path.join(diretorio, f"{nome}.{FORMATO_SNAPSHOT}.lock")
+        self._arquivo_lock = None
+        self._assinatura = None
+        self._renunciado_ate = 0.0
+        self.falhas_gravacao = 0
+
+    @property
+    def lider(self):
+        return fcntl is None or self._arquivo_lock is not None
+
+    def tentar_liderar(self):
+        """Tenta se tornar o processo que busca a planilha. Retorna True se for o líder."""
+        if self.lider:
+            return True
+        if time.monotonic() < self._renunciado_ate:
+            return False
+        arquivo = open(self._caminho_lock, "a")
+        try:
+            fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+        # O arquivo fica aberto (e o lock mantido) enquanto o processo viver
+        self._arquivo_lock = arquivo
+        return True
+
+    def renunciar(self, espera):
+        """Libera o lock de líder e não tenta retomá-lo pelos próximos `espera` segundos."""
+        if self._arquivo_lock is not None:
+            self._arquivo_lock.close()
+            self._arquivo_lock = None
+        self._renunciado_ate = time.monotonic() + espera
+
+    def _ler_assinatura(self):
+        try:
+            st = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def salvar(self, dados):
+        temporario = f"{self.caminho}.{os.getpid()}.tmp"
+        try:
+            with open(temporario, "wb") as f:
+                pickle.dump(
+                    {"formato": FORMATO_SNAPSHOT, **dados}, f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(temporario, self.caminho)
+        except BaseException:
+            # Disco cheio no meio da gravação: não deixa o arquivo parcial para trás
+            with contextlib.suppress(OSError):
+                os.remove(temporario)
+            raise
+        self._assinatura = self._ler_assinatura()
+
+    def carregar_se_mudou(self):
+        """Retorna os dados gravados se o arquivo mudou desde a última leitura, senão None."""
+        assinatura = self._ler_assinatura()
+        if assinatura is None or assinatura == self._assinatura:
+            return None
+        # Um arquivo ruim é lembrado pela assinatura e só é lido de novo quando mudar
+        self._assinatura = assinatura
+        try:
+            with open(self.caminho, "rb") as f:
+                if not _dono_e_o_processo(os.fstat(f.fileno())):
+                    print(f"Snapshot em {self.caminho} é de outro usuário; ignorado")
+                    return None
+                dados = pickle.load(f)
+            valido = (
+                isinstance(dados, dict)
+                and dados.get("formato") == FORMATO_SNAPSHOT
+                and list(dados["df"].columns) == COLUNAS_ESPERADAS
+            )
+        except Exception as e:
+            # Qualquer erro (arquivo truncado, pickle de outra versão do pandas)
+            # só faz o processo ignorar o arquivo, nunca impede o app de subir
+            print(f"Erro ao ler snapshot compartilhado {self.caminho}: {e!r}")
+            return None
+        if not valido:
+            print(f"Snapshot em {self.caminho} tem formato antigo; ignorado")
+            return None
+        return dados
+
+# ==========================
+# HISTÓRICO DOS SNAPSHOTS (SQLite, somente acréscimos)
+# ==========================
+# Colunas acompanhadas ao longo do tempo, por unidade
+COLUNAS_HISTORICO = ("qtd_convites", "confirmados", "ligacoes_efetuadas")
+# Desative (HISTORICO_ATIVO=0) para não gravar nem exibir a evolução
+HISTORICO_ATIVO = os.environ.get("HISTORICO_ATIVO", "1") != "0"
+# Janela dos gráficos de evolução e número máximo de pontos por série
+JANELA_HISTORICO_DIAS = int(os.environ.get("JANELA_HISTORICO_DIAS", 90))
+PONTOS_GRAFICO_HISTORICO = int(os.environ.get("PONTOS_GRAFICO_HISTORICO", 180))
+
+class HistoricoSnapshots:
+    """Histórico das versões da planilha gravado como deltas por unidade.
+
+    Cada snapshot novo acrescenta uma linha em `snapshots` (com os totais já
+    agregados) e, em `deltas`, só as unidades cujos valores mudaram desde o
+    snapshot anterior; uma unidade removida da planilha recebe uma linha com
+    os valores nulos. Só o processo líder grava; os demais apenas consultam.
+    As séries são reduzidas a no máximo `pontos` baldes de tempo (o último
+    valor de cada balde), então o tamanho dos gráficos não depende de quantos
+    snapshots existem.
+    """
+
+    def __init__(self, caminho):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        # Estado da última versão gravada (unidade -> valores), carregado sob demanda
+        self._estado = None
+        colunas = ", ".join(f"{coluna} INTEGER" for coluna in COLUNAS_HISTORICO)
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, capturado_em REAL NOT NULL, "
+                f"hash TEXT NOT NULL, unidades INTEGER NOT NULL, {colunas})"
+            )
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS deltas ("
+                f"snapshot_id INTEGER NOT NULL, unidade TEXT NOT NULL, {colunas})"
+            )
+            conexao.execute(
+                "CREATE INDEX IF NOT EXISTS deltas_unidade ON deltas (unidade, snapshot_id)"
+            )
+        conexao.close()
+
+    def _conectar(self):
+        # Uma conexão por operação: o sqlite3 não compartilha conexões entre threads
+        return sqlite3.connect(self.caminho, timeout=10)
+
+    @staticmethod
+    def _agrupar(df):
+        """Valores acompanhados somados por unidade (nomes repetidos são somados)."""
+        estado = df.groupby("nome", observed=True, sort=False)[list(COLUNAS_HISTORICO)].sum()
+        estado.index = estado.index.astype(str)
+        return estado.astype("int64")
+
+    def _estado_ate(self, conexao, snapshot_id=None):
+        """Valores de cada unidade como estavam no snapshot `snapshot_id` (None = último)."""
+        filtro = "" if snapshot_id is None else "WHERE snapshot_id <= :id"
+        colunas = ", ".join(f"d.{coluna}" for coluna in COLUNAS_HISTORICO)
+        estado = pd.read_sql_query(
+            f"SELECT d.unidade, {colunas} FROM deltas d JOIN ("
+            f"SELECT unidade, MAX(snapshot_id) AS id FROM deltas {filtro} GROUP BY unidade"
+            ") u ON d.unidade = u.unidade AND d.snapshot_id = u.id "
+            f"WHERE d.{COLUNAS_HISTORICO[0]} IS NOT NULL",
+            conexao, params={"id": snapshot_id}, index_col="unidade",
+        )
+        return estado.astype("int64")
+
+    @telemetria.cronometrado("dashboard_historico_gravacao_segundos")
+    def registrar(self, df, hash_conteudo, capturado_em):
+        """Acrescenta um snapshot ao histórico. Retorna o número de deltas gravados."""
+        atual = self._agrupar(df)
+        with self._lock, contextlib.closing(self._conectar()) as conexao, conexao:
+            ultimo = conexao.execute(
+                "SELECT hash FROM snapshots ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            # Um processo reiniciado baixa de novo a mesma planilha
+            if ultimo is not None and ultimo[0] == hash_conteudo:
+                return 0
+            if self._estado is None:
+                self._estado = self._estado_ate(conexao)
+            anterior = self._estado
+            mudou = (anterior.reindex(atual.index) != atual).any(axis=1)
+            alteradas = atual[mudou.to_numpy()]
+            removidas = anterior.index.difference(atual.index)
+
+            totais = atual.sum()
+            cursor = conexao.execute(
+                f"INSERT INTO snapshots (capturado_em, hash, unidades, {', '.join(COLUNAS_HISTORICO)}) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (capturado_em.timestamp(), hash_conteudo, len(atual),
+                 *(int(totais[coluna]) for coluna in COLUNAS_HISTORICO)),
+            )
+            snapshot_id = cursor.lastrowid
+            marcadores = ", ".join("?" * (len(COLUNAS_HISTORICO) + 2))
+            conexao.executemany(
+                f"INSERT INTO deltas VALUES ({marcadores})",
+                [(snapshot_id, unidade, *map(int, valores))
+                 for unidade, valores in zip(alteradas.index, alteradas.to_numpy())]
+                + [(snapshot_id, unidade) + (None,) * len(COLUNAS_HISTORICO) for unidade in removidas],
+            )
+            self._estado = atual
+            return len(alteradas) + len(removidas)
+
+    @staticmethod
+    def _balde(desde, ate, pontos):
+        return max((ate - desde) / pontos, 60.0)
+
+    @staticmethod
+    def _reduzir(serie, balde):
+        """Mantém o último valor de cada balde de tempo e converte as datas."""
+        if serie.empty:
+            return serie
+        serie = serie.groupby((serie["capturado_em"] // balde).astype("int64"), sort=True).last()
+        serie["capturado_em"] = (
+            pd.to_datetime(serie["capturado_em"].round().astype("int64"), unit="s", utc=True)
+            .dt.tz_convert(FUSO_HORARIO)
+        )
+        return serie.reset_index(drop=True)
 
-    # Ajusta colunas faltantes
-    if not all(c in df_temp.columns for c in expected_cols):
-        if len(df_temp.columns) >= len(expected_cols):
-            df_temp = df_temp.iloc[:, :len(expected_cols)]
-            df_temp.columns = expected_cols
+    def _periodo(self, conexao, dias):
+        """(início, fim, id do snapshot vigente no início) da janela de `dias` dias."""
+        fim, primeiro = conexao.execute(
+            "SELECT MAX(capturado_em), MIN(capturado_em) FROM snapshots"
+        ).fetchone()
+        if fim is None:
+            return None
+        desde = max(fim - dias * 86400, primeiro)
+        (snapshot_id,) = conexao.execute(
+            "SELECT MAX(id) FROM snapshots WHERE capturado_em <= ?", (desde,)
+        ).fetchone()
+        return desde, fim, snapshot_id
+
+    def serie(self, unidade=None, dias=90, pontos=180):
+        """Evolução dos totais (ou de uma unidade) nos últimos `dias` dias."""
+        colunas = ["capturado_em", *COLUNAS_HISTORICO]
+        with contextlib.closing(self._conectar()) as conexao:
+            periodo = self._periodo(conexao, dias)
+            if periodo is None:
+                return pd.DataFrame(columns=colunas)
+            desde, fim, snapshot_id = periodo
+            if unidade is None:
+                serie = pd.read_sql_query(
+                    f"SELECT {', '.join(colunas)} FROM snapshots WHERE capturado_em >= ? ORDER BY id",
+                    conexao, params=(desde,),
+                )
+            else:
+                # Deltas da unidade na janela, mais o valor vigente no início dela
+                serie = pd.read_sql_query(
+                    f"SELECT s.capturado_em, {', '.join('d.' + c for c in COLUNAS_HISTORICO)} "
+                    "FROM deltas d JOIN snapshots s ON s.id = d.snapshot_id "
+                    "WHERE d.unidade = ? AND (d.snapshot_id >= ? OR d.snapshot_id = ("
+                    "SELECT MAX(snapshot_id) FROM deltas WHERE unidade = ? AND snapshot_id <= ?"
+                    ")) ORDER BY d.snapshot_id",
+                    conexao, params=(unidade, snapshot_id, unidade, snapshot_id),
+                )
+                if not serie.empty:
+                    serie.loc[0, "capturado_em"] = max(serie.loc[0, "capturado_em"], desde)
+                    # A linha continua até o snapshot mais recente
+                    ultima = serie.iloc[[-1]].assign(capturado_em=fim)
+                    serie = pd.concat([serie, ultima], ignore_index=True)
+        return self._reduzir(serie, self._balde(desde, fim, pontos))
+
+    def crescimento_unidades(self, dias=90, limite=30):
+        """Quanto cada unidade cresceu na janela, para as `limite` que mais enviaram convites."""
+        with contextlib.closing(self._conectar()) as conexao:
+            periodo = self._periodo(conexao, dias)
+            if periodo is None:
+                return pd.DataFrame(columns=list(COLUNAS_HISTORICO))
+            inicio = self._estado_ate(conexao, periodo[2])
+            atual = self._estado_ate(conexao)
+        crescimento = atual.sub(inicio.reindex(atual.index, fill_value=0)).clip(lower=0)
+        return crescimento.nlargest(limite, COLUNAS_HISTORICO[0])
+
+class CacheDados:
+    """Snapshot do DataFrame da planilha compartilhado por todo o processo.
+
+    Todos os callbacks leem a mesma versão do DataFrame. Com o atualizador em
+    segundo plano ativo, os callbacks só leem memória; sem ele, o snapshot é
+    recarregado sob demanda quando o TTL expira e apenas uma thread baixa a
+    planilha enquanto as demais esperam no lock (single-flight).
+    Se a busca falhar, o último snapshot válido continua sendo servido; a
+    entrada e a saída da falha viram uma nova versão (ver _publicar_erro).
+    A planilha é baixada com requisição condicional e o hash do conteúdo bruto
+    é guardado: se nada mudou, o CSV não é interpretado de novo e a versão
+    permanece a mesma.
+    As métricas derivadas (KPIs e rankings) são calculadas uma única vez por
+    versão, junto com a troca do snapshot.
+    Com um ArmazemSnapshot, só o processo líder busca a planilha; os demais
+    adotam a versão gravada por ele em disco.
+    Com um HistoricoSnapshots, cada versão nova baixada é acrescentada ao
+    histórico (só pelo líder).
+    Cada troca de snapshot acorda quem espera em aguardar_versao() (o canal de
+    eventos enviado aos navegadores).
+    Se a busca falha, a próxima tentativa espera um backoff exponencial em vez
+    do TTL (ver espera()).
+    O DataFrame retornado é compartilhado: não deve ser modificado no lugar.
+    """
+
+    def __init__(self, url, ttl, armazem=None, historico=None, nome=FONTE_PADRAO):
+        self.nome = nome
+        self.url = url
+        self.ttl = ttl
+        self.armazem = armazem
+        self.historico = historico
+        self._etag = None
+        self._last_modified = None
+        self._hash = None
+        self._lock = threading.Lock()
+        self._lock_contadores = threading.Lock()
+        self._atual = _snapshot_vazio()
+        self._nova_versao = threading.Condition()
+        self._tentado_em = None
+        self.ultimo_erro = None
+        self.falhas_seguidas = 0
+        self.atualizador_ativo = False
+        self.hits = 0
+        self.misses = 0
+
+    def _valido(self):
+        if self.atualizador_ativo:
+            # Com o atualizador rodando, só busca na requisição se ele ainda
+            # não fez nenhuma tentativa e não há snapshot lido do disco
+            return self._tentado_em is not None or self._atual.versao > 0
+        return self._tentado_em is not None and time.monotonic() - self._tentado_em < self.espera()
+
+    def espera(self):
+        """Segundos até a próxima busca: o TTL, ou o backoff se a última falhou."""
+        if not self.falhas_seguidas:
+            return self.ttl
+        return min(BACKOFF_INICIAL_SEGUNDOS * 2 ** (self.falhas_seguidas - 1), BACKOFF_MAXIMO_SEGUNDOS)
+
+    @property
+    def versao(self):
+        return self._atual.versao
+
+    @property
+    def atualizado_em(self):
+        return self._atual.atualizado_em
+
+    @property
+    def snapshot_atual(self):
+        """Snapshot em memória, sem contar acesso nem buscar a planilha (para o /metrics)."""
+        return self._atual
+
+    def _contar(self, hit):
+        with self._lock_contadores:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        telemetria.incrementar(
+            "dashboard_cache_hits_total" if hit else "dashboard_cache_misses_total", fonte=self.nome
+        )
+
+    def _trocar_snapshot(self, snapshot):
+        with self._nova_versao:
+            self._atual = snapshot
+            self._nova_versao.notify_all()
+
+    def aguardar_versao(self, versao, timeout):
+        """Espera até haver uma versão diferente de `versao` (ou o timeout) e a retorna."""
+        with self._nova_versao:
+            self._nova_versao.wait_for(lambda: self._atual.versao != versao, timeout)
+            return self._atual.versao
+
+    def _sincronizar_sem_lock(self):
+        """Adota o snapshot gravado em disco por outro processo, se for mais novo."""
+        dados = self.armazem.carregar_se_mudou()
+        if dados is None or dados["versao"] <= self._atual.versao:
+            return False
+        df = dados["df"]
+        self._trocar_snapshot(Snapshot(
+            df, calcular_metricas(df), dados["versao"], dados["atualizado_em"],
+            dados.get("erro"), dados.get("erro_em")
+        ))
+        self._hash = dados["hash"]
+        self._etag, self._last_modified = dados["etag"], dados["last_modified"]
+        return True
+
+    def _atualizar_sem_lock(self):
+        # Evita nova tentativa a cada requisição enquanto a planilha está fora
+        self._tentado_em = time.monotonic()
+        if self.armazem is not None:
+            if not self.armazem.tentar_liderar():
+                return self._sincronizar_sem_lock()
+            # Líder recém-eleito continua a partir da versão já gravada em disco
+            self._sincronizar_sem_lock()
+        try:
+            resposta = baixar_planilha(self.url, self._etag, self._last_modified, fonte=self.nome)
+            self.falhas_seguidas = 0
+            if resposta.conteudo is None:
+                self.ultimo_erro = None
+                return self._publicar_erro(None)
+            hash_conteudo = hashlib.sha256(resposta.conteudo).hexdigest()
+            if hash_conteudo == self._hash:
+                self._etag, self._last_modified = resposta.etag, resposta.last_modified
+                self.ultimo_erro = None
+                return self._publicar_erro(None)
+            df = interpretar_planilha(resposta.conteudo)
+        except ErroDados as e:
+            print(f"[{self.nome}] {e}")
+            self.ultimo_erro = str(e)
+            self.falhas_seguidas += 1
+            return self._publicar_erro(str(e))
+        atualizado_em = datetime.now(FUSO_HORARIO)
+        # O histórico é gravado antes da troca do snapshot: quem vê a versão
+        # nova (neste ou em outro processo) já encontra a evolução atualizada
+        if self.historico is not None:
+            try:
+                self.historico.registrar(df, hash_conteudo, atualizado_em)
+            except sqlite3.Error as e:
+                print(f"Erro ao gravar o histórico: {e}")
+        self._trocar_snapshot(Snapshot(
+            df, calcular_metricas(df), self._atual.versao + 1, atualizado_em
+        ))
+        self._hash = hash_conteudo
+        self._etag, self._last_modified = resposta.etag, resposta.last_modified
+        self.ultimo_erro = None
+        if self.armazem is not None:
+            self._salvar_no_armazem(df)
+        return True
+
+    def _publicar_erro(self, erro):
+        """Publica como nova versão (mesmos dados) a entrada ou saída do estado de falha.
+
+        Só a mudança de estado gera versão: falhas seguidas durante o backoff
+        não fazem os clientes renderizarem de novo. Retorna True se publicou.
+        """
+        atual = self._atual
+        if (atual.erro is None) == (erro is None):
+            return False
+        self._trocar_snapshot(atual._replace(
+            versao=atual.versao + 1, erro=erro,
+            erro_em=datetime.now(FUSO_HORARIO) if erro is not None else None,
+        ))
+        if self.armazem is not None:
+            self._salvar_no_armazem(atual.df)
+        return True
+
+    def _salvar_no_armazem(self, df):
+        """Grava o snapshot para os outros workers; uma falha não derruba o atualizador.
+
+        O snapshot em memória continua valendo neste processo. Depois de
+        MAXIMO_FALHAS_GRAVACAO falhas seguidas o líder cede o lock, para que
+        outro worker (talvez com o disco em ordem) assuma as buscas.
+        """
+        try:
+            self.armazem.salvar({
+                "versao": self._atual.versao,
+                "atualizado_em": self._atual.atualizado_em,
+                "hash": self._hash,
+                "etag": self._etag,
+                "last_modified": self._last_modified,
+                "erro": self._atual.erro,
+                "erro_em": self._atual.erro_em,
+                "df": df,
+            })
+        except (OSError, pickle.PicklingError) as e:
+            self.armazem.falhas_gravacao += 1
+            telemetria.incrementar("dashboard_snapshot_gravacao_erros_total", fonte=self.nome)
+            print(f"[{self.nome}] Erro ao gravar o snapshot compartilhado: {e}")
+            if self.armazem.falhas_gravacao >= MAXIMO_FALHAS_GRAVACAO:
+                print(f"[{self.nome}] {self.armazem.falhas_gravacao} falhas seguidas; cedendo a liderança")
+                self.armazem.falhas_gravacao = 0
+                self.armazem.renunciar(max(self.ttl, 2 * INTERVALO_SINCRONIZACAO_SEGUNDOS))
+        else:
+            self.armazem.falhas_gravacao = 0
+
+    def atualizar(self):
+        """Busca a planilha e troca o snapshot. Retorna True se surgiu uma nova versão."""
+        with self._lock:
+            return self._atualizar_sem_lock()
+
+    def sincronizar(self):
+        """Adota já a versão gravada em disco pelo líder, sem esperar o atualizador."""
+        if self.armazem is None:
+            return False
+        with self._lock:
+            return self._sincronizar_sem_lock()
+
+    def obter_snapshot(self):
+        if self._valido():
+            self._contar(hit=True)
+            return self._atual
+        with self._lock:
+            # Quem esperou o lock reaproveita a carga feita pela outra thread
+            if self._valido():
+                self._contar(hit=True)
+                return self._atual
+            self._contar(hit=False)
+            self._atualizar_sem_lock()
+            return self._atual
+
+    def estatisticas(self):
+        with self._lock_contadores:
+            total = self.hits + self.misses
+            return {
+                "fonte": self.nome,
+                "versao": self.versao,
+                "falhas_seguidas": self.falhas_seguidas,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "atualizado_em": self.atualizado_em,
+                "ultimo_erro": self.ultimo_erro,
+            }
+
+def criar_cache(nome, url):
+    """Cache de uma fonte, com snapshot compartilhado e histórico próprios."""
+    identificador = hashlib.sha1(url.encode()).hexdigest()[:12]
+    return CacheDados(
+        url, CACHE_TTL_SEGUNDOS,
+        ArmazemSnapshot(DIRETORIO_DADOS, "snapshot-" + identificador),
+        HistoricoSnapshots(os.path.join(DIRETORIO_DADOS, f"historico-{identificador}.sqlite3"))
+        if HISTORICO_ATIVO else None,
+        nome=nome,
+    )
+
+# Um cache por fonte: uma planilha lenta ou fora do ar não afeta as outras
+caches_dados = {nome: criar_cache(nome, url) for nome, url in FONTES.items()}
+cache_dados = caches_dados[FONTE_PADRAO]
+
+def obter_cache(fonte=None):
+    """Cache da fonte pedida; fontes desconhecidas caem na padrão."""
+    return caches_dados.get(fonte, cache_dados)
+
+def _loop_atualizador(cache, parar):
+    while not parar.is_set():
+        try:
+            cache.atualizar()
+        except Exception as e:
+            # Um erro inesperado (leitura do CSV, disco, pickle) não pode parar
+            # as atualizações deste processo: conta como falha e tenta de novo
+            cache.falhas_seguidas += 1
+            telemetria.incrementar("dashboard_atualizador_erros_total", fonte=cache.nome)
+            print(f"[{cache.nome}] Erro inesperado no atualizador: {e!r}")
+        # Quem não é líder só lê o disco, então pode verificar com mais frequência
+        if cache.armazem is None or cache.armazem.lider:
+            parar.wait(cache.espera())
         else:
-            return pd.DataFrame(columns=expected_cols)
+            parar.wait(min(cache.ttl, INTERVALO_SINCRONIZACAO_SEGUNDOS))
+
+def iniciar_atualizador(cache):
+    """Inicia a thread que mantém o snapshot de uma fonte atualizado fora das requisições.
 
-    df_temp = df_temp[expected_cols].copy()
-    df_temp.dropna(subset=['nome'], inplace=True)
+    Cada fonte tem a sua thread, então as planilhas são buscadas em paralelo.
+    """
+    parar = threading.Event()
+    thread = threading.Thread(
+        target=_loop_atualizador, args=(cache, parar),
+        name=f"atualizador-{cache.nome}", daemon=True
+    )
+    cache.atualizador_ativo = True
+    thread.start()
+    return parar
 
-    # Converte números
-    for col in ["qtd_convites","meta_convites","progresso_convites","confirmados",
-                "meta_confirmados","media_confirmados","ligacoes_efetuadas",
-                "confirmacoes_ligacoes","qtd_top_convites","convites_confirmados"]:
-        df_temp[col] = pd.to_numeric(df_temp[col], errors='coerce').fillna(0)
+# ==========================
+# MEMO DAS SAÍDAS RENDERIZADAS (por versão dos dados)
+# ==========================
+# As saídas dos callbacks dependem só da versão dos dados e das entradas, não
+# de quem pede: com várias TVs abertas no dashboard cada combinação é
+# renderizada uma vez por versão e reaproveitada nas demais requisições.
+MEMO_RENDERIZACAO_MAXIMO = int(os.environ.get("MEMO_RENDERIZACAO_MAXIMO", 256))
+
+class MemoRenderizacao:
+    """Cache LRU de (callback, fonte, versão, entradas) -> saída.
+
+    As saídas de uma fonte são descartadas quando surge uma nova versão dela.
+    """
+
+    def __init__(self, maximo=MEMO_RENDERIZACAO_MAXIMO):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()
+        # Uma trava por chave: requisições simultâneas esperam a mesma renderização
+        self._em_andamento = {}
+        self._versoes = {}
+
+    def _invalidar_se_mudou(self, fonte, versao):
+        if self._versoes.get(fonte, versao) != versao:
+            for chave in [chave for chave in self._itens if chave[1] == fonte]:
+                del self._itens[chave]
+        self._versoes[fonte] = versao
+
+    def obter(self, callback, fonte, versao, entradas, gerar):
+        """Retorna a saída memorizada ou chama gerar() e a guarda."""
+        chave = (callback, fonte, versao, entradas)
+        with self._lock:
+            self._invalidar_se_mudou(fonte, versao)
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                telemetria.incrementar("dashboard_memo_renderizacao_total", callback=callback, resultado="hit")
+                return self._itens[chave]
+            trava = self._em_andamento.setdefault(chave, threading.Lock())
+
+        with trava:
+            with self._lock:
+                if chave in self._itens:
+                    telemetria.incrementar("dashboard_memo_renderizacao_total", callback=callback, resultado="hit")
+                    return self._itens[chave]
+            try:
+                saida = gerar()
+                with self._lock:
+                    telemetria.incrementar("dashboard_memo_renderizacao_total", callback=callback, resultado="miss")
+                    # Uma versão mais nova pode ter chegado durante a renderização
+                    if versao == self._versoes.get(fonte):
+                        self._itens[chave] = saida
+                        while len(self._itens) > self.maximo:
+                            self._itens.popitem(last=False)
+            finally:
+                # Também se gerar() falhar: senão a trava da chave ficaria para sempre
+                with self._lock:
+                    self._em_andamento.pop(chave, None)
+            return saida
+
+    def limpar(self):
+        """Descarta todas as saídas guardadas (usado pelo benchmark)."""
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
 
-    return df_temp
+memo_renderizacao = MemoRenderizacao()
 
 # ==================================
 # 🟨 FUNÇÃO ATUALIZADA: GERAR TABELA COM CORES
 # ==================================
+# Classes CSS (assets/style.css) das linhas pela taxa confirmados / meta de confirmados
+CLASSE_LINHA_VERDE = "linha-verde"        # taxa >= 90%
+CLASSE_LINHA_AMARELA = "linha-amarela"    # taxa >= 60%
+CLASSE_LINHA_VERMELHA = "linha-vermelha"  # abaixo de 60%
+
+def taxa_confirmacao(df):
+    """Confirmados / meta de confirmados de cada linha (0 quando não há meta)."""
+    meta = df['meta_confirmados'].to_numpy(dtype='float64')
+    confirmados = df['confirmados'].to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(meta > 0, confirmados / meta, 0)
+
+def classes_linhas(df):
+    """Calcula de uma vez a classe de cor de cada linha da tabela."""
+    taxa = taxa_confirmacao(df)
+    return np.select(
+        [taxa >= 0.90, taxa >= 0.60],
+        [CLASSE_LINHA_VERDE, CLASSE_LINHA_AMARELA],
+        default=CLASSE_LINHA_VERMELHA
+    )
+
+def _formatar_coluna(serie):
+    """Formata uma coluna inteira: números com separador de milhar, vazios como N/A."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return formatar_numeros(serie)
+    return serie.astype(str).mask(serie.isna(), "N/A").tolist()
+
 def gerar_tabela_formatada(df):
     if df.empty:
         return html.Div("Nenhum dado encontrado.")
 
-    # --- Função de cor (apenas fundo) ---
-    def cor_linha(row):
-        try:
-            taxa = row['confirmados'] / row['meta_confirmados'] if row['meta_confirmados'] > 0 else 0
-        except Exception:
-            taxa = 0
-
-        if taxa >= 0.90:
-            return "#c4f4d4"  # Verde
-        elif taxa >= 0.60:
-            return "#fff8b3"  # Amarelo
-        else:
-            return "#fceb00"  # Vermelho (não rosa forte)
-
-    # --- Tabela formatada ---
-    tabela = html.Table([
-        html.Thead(
-            html.Tr([
-                html.Th(
-                    col,
-                    style={
-                        'backgroundColor': '#1f2937',
-                        'color': 'white',
-                        'padding': '8px',
-                        'fontWeight': 'bold',
-                        'border': '2px solid #fff'
-                    }
-                )
-                for col in df.columns
-            ])
-        ),
+    colunas = [_formatar_coluna(df[col]) for col in df.columns]
+
+    # Estilos de cabeçalho, células e cores ficam nas classes de assets/style.css
+    return html.Table([
+        html.Thead(html.Tr([html.Th(col) for col in df.columns])),
         html.Tbody([
-            html.Tr([
-                html.Td(
-                    formatar_numero(cell) if isinstance(cell, (int, float)) else cell,
-                    style={
-                        'padding': '6px',
-                        'textAlign': 'center',
-                        'border': '2px solid white',
-                        'color': 'black',
-                        'fontSize': '13px',
-                        'fontWeight': '600'
-                    }
-                )
-                for cell in row
-            ],
-            style={'backgroundColor': cor_linha(df.iloc[i])})
-            for i, row in enumerate(df.values)
+            html.Tr([html.Td(valor) for valor in linha], className=classe)
+            for classe, linha in zip(classes_linhas(df).tolist(), zip(*colunas))
         ])
-    ],
-    style={
-        'width': '100%',
-        'borderCollapse': 'collapse',
-        'fontFamily': 'Arial, sans-serif'
-    })
+    ], className='tabela-performance')
+
+# ==================================
+# PAGINAÇÃO, ORDENAÇÃO E FILTRO DA TABELA (lado do servidor)
+# ==================================
+TAMANHO_PAGINA_TABELA = int(os.environ.get("TAMANHO_PAGINA_TABELA", 25))
+
+# Colunas de texto consideradas pelo filtro da tabela
+COLUNAS_FILTRO = [
+    "nome", "vendedor_top_convites", "unidade_top_convites",
+    "vendedor_confirmado", "unidade_confirmado",
+]
+
+OPCOES_ORDENACAO = [{'label': col, 'value': col} for col in COLUNAS_ESPERADAS] + [
+    {'label': 'taxa de confirmação', 'value': 'taxa_confirmacao'}
+]
+
+def _contem_texto(serie, filtro):
+    """Máscara das linhas cujo texto contém filtro (já em minúsculas)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Testa cada categoria uma vez só; o código -1 (vazio) cai no último False
+        casa = serie.cat.categories.astype(str).str.lower().str.contains(filtro, regex=False)
+        return np.append(np.asarray(casa, dtype=bool), False)[serie.cat.codes.to_numpy()]
+    return serie.astype(str).str.lower().str.contains(filtro, regex=False).to_numpy(dtype=bool)
+
+def _chave_ordenacao(serie):
+    """Ordena categorias pelo texto (e não pela ordem de aparição na planilha)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.reorder_categories(sorted(serie.cat.categories))
+    return serie
+
+def consultar_tabela(df, filtro=None, ordenar_por=None, decrescente=True,
+                     pagina=0, tamanho_pagina=TAMANHO_PAGINA_TABELA):
+    """Filtra, ordena e recorta uma página do snapshot.
 
-    return tabela
+    Retorna (df_pagina, pagina, total_paginas, total_linhas); a página é
+    ajustada para o intervalo válido.
+    """
+    if filtro:
+        filtro = filtro.strip().lower()
+        encontrado = np.zeros(len(df), dtype=bool)
+        for col in COLUNAS_FILTRO:
+            encontrado |= _contem_texto(df[col], filtro)
+        df = df[encontrado]
+
+    if ordenar_por == 'taxa_confirmacao':
+        ordem = np.argsort(taxa_confirmacao(df), kind='stable')
+        df = df.iloc[ordem[::-1] if decrescente else ordem]
+    elif ordenar_por in df.columns:
+        df = df.sort_values(
+            ordenar_por, ascending=not decrescente, kind='stable', key=_chave_ordenacao
+        )
+
+    total_linhas = len(df)
+    total_paginas = max(1, -(-total_linhas // tamanho_pagina))
+    pagina = min(max(pagina or 0, 0), total_paginas - 1)
+    inicio = pagina * tamanho_pagina
+    return df.iloc[inicio:inicio + tamanho_pagina], pagina, total_paginas, total_linhas
 
 # ==========================
 # FUNÇÃO PARA GERAR LAYOUT (mantendo seu layout original)
 # ==========================
-def gerar_layout(df):
-    # Renomear colunas para nomes legíveis no layout
-    df = df.rename(columns={
-        'qtd_convites': 'Quantidade de convites',
-        'meta_convites': 'Meta de convites',
-        'confirmados': 'Confirmados',
-        'meta_confirmados': 'Meta_confirmados',
-        'ligacoes_efetuadas': 'Ligacoes_efetuadas',
-        'confirmacoes_ligacoes': 'Ligações confirmadas',
-        'nome': 'Nome'
-    })
-
-    # calcula KPIs globais
-    total_convites = df['Quantidade de convites'].sum()
-    meta_convites_global = df['Meta de convites'].sum()
-    total_confirmados = df['Confirmados'].sum()
-    meta_confirmados_global = df['Meta_confirmados'].sum()
-    total_ligacoes = df['Ligacoes_efetuadas'].sum()
-    media_geral_progresso = (total_convites / meta_convites_global) if meta_convites_global > 0 else 0
-    media_geral_confirmacao = (total_confirmados / total_convites) if total_convites > 0 else 0
-
-    if not df.empty:
-        try:
-            loja_mais_confirmacoes = df.loc[df['Ligações confirmadas'].idxmax()]
-            nome_loja_mais_confirmacoes = loja_mais_confirmacoes['Nome']
-            valor_mais_confirmacoes = loja_mais_confirmacoes['Ligações confirmadas']
-        except Exception:
-            nome_loja_mais_confirmacoes = "N/A"
-            valor_mais_confirmacoes = 0
-    else:
-        nome_loja_mais_confirmacoes = "N/A"
-        valor_mais_confirmacoes = 0
-
-    # Data de atualização (horário de Brasília)
-    data_modificacao = datetime.now(pytz.timezone("America/Sao_Paulo"))
-    ultima_atualizacao = data_modificacao.strftime("%d/%m/%Y %H:%M")
-
+def gerar_layout():
+    """Estrutura estática da página; os valores são preenchidos pelos callbacks de dados."""
     # Build layout
     return html.Div(children=[
 
         # CABEÇALHO COM LOGO + TÍTULO + DATA
         html.Div(className='header-section', children=[
             html.Div(className='header-content-wrapper', children=[
-                html.Div(className='header-text-container', style={'display': 'flex', 'align-items': 'center'}, children=[
+                html.Div(className='header-text-container', children=[
                     html.Img(
-                        src='/assets/logo.png',
-                        style={'height': '180px', 'width': 'auto', 'margin-right': '15px'}
+                        src='/assets/logo.png', className='header-logo'
                     ),
                     html.Div(children=[
                         html.H1(
                             "🏆 Dashboard de Performance por Unidades - Grupo Primavia",
                             className='dashboard-title grupo-Primavia-header'
                         ),
-                        html.Div(
-                            f"📅 Última atualização dos dados: {ultima_atualizacao}",
-                            style={
-                                'fontSize': '16px',
-                                'color': '#374151',
-                                'fontWeight': '600',
-                                'marginTop': '5px'
-                            }
-                        )
+                        html.Div(id='ultima-atualizacao', className='ultima-atualizacao'),
+                        # Uma planilha por campanha/região: cada link abre o dashboard de uma fonte
+                        html.Div(className='seletor-fontes', children=[
+                            html.A(nome, href=f"?fonte={nome}") for nome in FONTES
+                        ]) if len(FONTES) > 1 else None,
                     ])
                 ])
             ])
@@ -270,31 +1295,31 @@ def gerar_layout(df):
 
                 html.Div(className='kpi-card', children=[
                     html.H3("Total Convites Enviados"),
-                    html.P(formatar_numero(total_convites), className='kpi-value'),
+                    html.P(id='kpi-total-convites', className='kpi-value'),
                     html.Small("Total de convites já enviados")
                 ]),
 
                 html.Div(className='kpi-card', children=[
                     html.H3("Total Confirmados"),
-                    html.P(formatar_numero(total_confirmados), className='kpi-value'),
-                    html.Small(f"Meta Global: {formatar_numero(meta_confirmados_global)}")
+                    html.P(id='kpi-total-confirmados', className='kpi-value'),
+                    html.Small(id='kpi-meta-confirmados')
                 ]),
 
                 html.Div(className='kpi-card', children=[
                     html.H3("Total Ligações"),
-                    html.P(formatar_numero(total_ligacoes), className='kpi-value'),
+                    html.P(id='kpi-total-ligacoes', className='kpi-value'),
                     html.Small("Ligações Efetuadas")
                 ]),
 
                 html.Div(className='kpi-card highlight', children=[
                     html.H3("Média Geral de Progresso"),
-                    html.P(f"{media_geral_progresso:.2%}", className='kpi-value'),
+                    html.P(id='kpi-progresso-geral', className='kpi-value'),
                     html.Small("Convites / Meta")
                 ]),
 
                 html.Div(className='kpi-card highlight', children=[
                     html.H3("Taxa Geral de Confirmação"),
-                    html.P(f"{media_geral_confirmacao:.2%}", className='kpi-value'),
+                    html.P(id='kpi-taxa-confirmacao', className='kpi-value'),
                     html.Small("Confirmados / Convites")
                 ]),
             ]),
@@ -304,21 +1329,15 @@ def gerar_layout(df):
             html.Div(className='kpi-grid three-columns', children=[
                 html.Div(className='kpi-card success-card destaque-loja', children=[
                     html.H3("🥇 Top 10 vendedores que enviaram mais convites"),
-                    html.Div(id='kpi-top-10-convites', className="kpi-list", style={
-                        'overflowX': 'auto', 'whiteSpace': 'nowrap', 'maxWidth': '100%', 'padding': '5px'
-                    })
+                    html.Div(id='kpi-top-10-convites', className="kpi-list")
                 ]),
                 html.Div(className='kpi-card success-card', children=[
                     html.H3("🚀 Top 5 lojas que mais enviaram convites"),
-                    html.Div(id='kpi-top-5-convites', className="kpi-list", style={
-                        'overflowX': 'auto', 'whiteSpace': 'nowrap', 'maxWidth': '100%', 'padding': '5px'
-                    })
+                    html.Div(id='kpi-top-5-convites', className="kpi-list")
                 ]),
                 html.Div(className='kpi-card success-card', children=[
                     html.H3("🥇🥈🥉 Top 5 lojas com mais confirmações"),
-                    html.Div(id='kpi-top-3-confirmadas', className="kpi-list", style={
-                        'overflowX': 'auto', 'whiteSpace': 'nowrap', 'maxWidth': '100%', 'padding': '5px'
-                    })
+                    html.Div(id='kpi-top-3-confirmadas', className="kpi-list")
                 ]),
             ]),
 
@@ -326,21 +1345,15 @@ def gerar_layout(df):
             html.Div(className='kpi-grid three-columns', children=[
                 html.Div(className='kpi-card success-card destaque-loja', children=[
                     html.H3("🥇 Top 10 vendedores com convites confirmados"),
-                    html.Div(id='kpi-top-10-confirmados', className="kpi-list", style={
-                        'overflowX': 'auto', 'whiteSpace': 'nowrap', 'maxWidth': '100%', 'padding': '5px'
-                    })
+                    html.Div(id='kpi-top-10-confirmados', className="kpi-list")
                 ]),
                 html.Div(className='kpi-card warning-card', children=[
                     html.H3("🐢 Top 5 lojas que menos enviaram convites"),
-                    html.Div(id='kpi-bottom-3-convites', className="kpi-list", style={
-                        'overflowX': 'auto', 'whiteSpace': 'nowrap', 'maxWidth': '100%', 'padding': '5px'
-                    })
+                    html.Div(id='kpi-bottom-3-convites', className="kpi-list")
                 ]),
                 html.Div(className='kpi-card warning-card', children=[
                     html.H3("🐌 Top 5 lojas com menos confirmações"),
-                    html.Div(id='kpi-bottom-5-confirmados', className="kpi-list", style={
-                        'overflowX': 'auto', 'whiteSpace': 'nowrap', 'maxWidth': '100%', 'padding': '5px'
-                    })
+                    html.Div(id='kpi-bottom-5-confirmados', className="kpi-list")
                 ]),
             ]),
 
@@ -349,22 +1362,73 @@ def gerar_layout(df):
                 html.H2("Análise Detalhada de Performance", className='section-title'),
                 dcc.Dropdown(
                     id='select-unidade',
-                    options=[{'label': i, 'value': i} for i in df['Nome'].unique()],
+                    options=[],
                     placeholder="Selecione uma Unidade para ver detalhes...",
-                    style={'width': '100%', 'maxWidth': '600px', 'margin': '0 auto 20px auto'}
+                    className='select-unidade'
                 ),
                 html.Div(id='detalhe-unidade', className='kpi-grid', style={'display': 'none'})
             ]),
 
             # 3. TABELA DE DADOS
             html.H2("Performance Detalhada por Unidade", className='section-title'),
+            html.Div(className='controles-tabela', children=[
+                dcc.Input(
+                    id='filtro-tabela', type='text', debounce=True,
+                    placeholder="Filtrar por unidade ou vendedor..."
+                ),
+                dcc.Dropdown(
+                    id='ordenar-tabela', options=OPCOES_ORDENACAO,
+                    placeholder="Ordenar por...", className='ordenar-tabela'
+                ),
+                dcc.RadioItems(
+                    id='direcao-tabela', inline=True, value='desc',
+                    options=[
+                        {'label': 'Decrescente', 'value': 'desc'},
+                        {'label': 'Crescente', 'value': 'asc'},
+                    ]
+                ),
+                html.Div(className='exportar-tabela', children=[
+                    html.Span("Exportar:"),
+                    html.A("Dados (CSV)", id='exportar-dados-csv', href="exportar/dados.csv"),
+                    html.A("Dados (Excel)", id='exportar-dados-xlsx', href="exportar/dados.xlsx"),
+                    html.A("Rankings (CSV)", id='exportar-rankings-csv', href="exportar/rankings.csv"),
+                    html.A("Rankings (Excel)", id='exportar-rankings-xlsx', href="exportar/rankings.xlsx"),
+                ]),
+            ]),
             html.Div(className='chart-container', children=[
-                html.Div(id='tabela-geral-dados', style={'height': 'auto'}),
+                html.Div(id='tabela-geral-dados'),
+            ]),
+            html.Div(className='paginacao-tabela', children=[
+                html.Button("◀ Anterior", id='pagina-anterior', n_clicks=0),
+                html.Span(id='info-pagina-tabela'),
+                html.Button("Próxima ▶", id='pagina-seguinte', n_clicks=0),
+                dcc.Store(id='pagina-tabela', data=0),
             ]),
 
-            html.Div(id='placeholder-grafico-ranking', style={'display': 'none'}),
-            html.Div(id='placeholder-grafico-ligacoes', style={'display': 'none'}),
-            html.Div(id='grafico-performance-bolhas', style={'display': 'none'}),
+            # 4. EVOLUÇÃO (histórico dos snapshots; segue a unidade selecionada acima)
+            html.Div(
+                className='secao-evolucao',
+                style={} if HISTORICO_ATIVO else {'display': 'none'},
+                children=[
+                    html.H2(f"Evolução nos Últimos {JANELA_HISTORICO_DIAS} Dias", className='section-title'),
+                    # Controle próprio: trocar a unidade do detalhe acima não vai ao servidor
+                    dcc.Dropdown(
+                        id='unidade-evolucao',
+                        options=[],
+                        placeholder="Todas as unidades (selecione uma para filtrar os gráficos)",
+                        className='select-unidade'
+                    ),
+                    html.Div(id='placeholder-grafico-ranking', className='chart-container', children=[
+                        dcc.Graph(id='grafico-evolucao-convites', config={'displayModeBar': False}),
+                    ]),
+                    html.Div(id='placeholder-grafico-ligacoes', className='chart-container', children=[
+                        dcc.Graph(id='grafico-evolucao-ligacoes', config={'displayModeBar': False}),
+                    ]),
+                    html.Div(id='grafico-performance-bolhas', className='chart-container', children=[
+                        dcc.Graph(id='grafico-crescimento-unidades', config={'displayModeBar': False}),
+                    ]),
+                ]
+            ),
         ])
     ])
 
@@ -372,178 +1436,724 @@ def gerar_layout(df):
 # INICIALIZAÇÃO DO DASH
 # ==========================
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
+# Servidor WSGI usado pelo gunicorn (Procfile: gunicorn app:server)
+server = app.server
+
+# Warm start: serve o último snapshot válido gravado em disco enquanto a
+# primeira busca da planilha roda em segundo plano
+for cache_fonte in caches_dados.values():
+    cache_fonte.sincronizar()
+
+# Busca a planilha em segundo plano; os callbacks só leem o snapshot em memória
+if ATUALIZADOR_ATIVO:
+    for cache_fonte in caches_dados.values():
+        iniciar_atualizador(cache_fonte)
 
-# Mantemos um layout externo que será reconstruído a cada intervalo
+# Layout estático servido uma única vez; a cada nova versão dos dados só os
+# componentes com valores (KPIs, rankings, opções do dropdown, data) são atualizados
+# A atualização chega por push (/eventos, assets/eventos.js); o intervalo só
+# fica ativo enquanto o canal de eventos estiver desconectado
 app.layout = html.Div([
+    # ?fonte=nome escolhe a planilha exibida (ver FONTES_PLANILHAS)
+    dcc.Location(id='url', refresh=False),
     dcc.Interval(id='interval-update-data', interval=5 * 60 * 1000, n_intervals=0),
-    html.Div(id='layout-div')
+    # Última versão anunciada pelo servidor no canal de eventos
+    dcc.Store(id='versao-servidor'),
+    # Versão dos dados exibida neste cliente; só muda quando a planilha muda
+    dcc.Store(id='versao-dados'),
+    # Snapshot compacto (KPIs, rankings, detalhes) renderizado no navegador
+    dcc.Store(id='snapshot-dados'),
+    gerar_layout()
 ])
 
-# Callback para reconstruir layout a cada intervalo (5 minutos)
-@app.callback(
-    Output('layout-div', 'children'),
-    Input('interval-update-data', 'n_intervals')
-)
-def rebuild_layout(n):
-    df_local = carregar_dados()
-    return gerar_layout(df_local)
+def textos_kpis(snapshot):
+    """Textos do cabeçalho e dos KPIs globais para um snapshot."""
+    metricas = snapshot.metricas
+    # Data de atualização (horário de Brasília) do snapshot em uso
+    data_modificacao = snapshot.atualizado_em or datetime.now(FUSO_HORARIO)
+    ultima_atualizacao = data_modificacao.strftime("%d/%m/%Y %H:%M")
+    if snapshot.erro is not None:
+        ultima_atualizacao += (
+            f" (falha ao atualizar às {snapshot.erro_em.strftime('%H:%M')},"
+            " exibindo últimos dados válidos)"
+        )
+    return (
+        f"📅 Última atualização dos dados: {ultima_atualizacao}",
+        formatar_numero(metricas.total_convites),
+        formatar_numero(metricas.total_confirmados),
+        f"Meta Global: {formatar_numero(metricas.meta_confirmados)}",
+        formatar_numero(metricas.total_ligacoes),
+        formatar_percentual(metricas.progresso_geral),
+        formatar_percentual(metricas.taxa_confirmacao),
+    )
 
-# Callback para detalhe por unidade (mantém comportamento original)
-@app.callback(
-    Output('detalhe-unidade', 'children'),
-    Output('detalhe-unidade', 'style'),
-    Input('select-unidade', 'value')
-)
-def exibir_detalhe_unidade(selected_unidade):
-    if not selected_unidade:
-        return "", {'display': 'none'}
-    
-    df_current = carregar_dados().copy()
-    unidade = df_current[df_current['nome'] == selected_unidade].iloc[0]
-
-    children = [
-        html.Div(className='kpi-card highlight', children=[
-            html.H3(unidade['nome']),
-            html.P(f"{unidade['progresso_convites']:.2%}", className='kpi-value'),
-            html.Small("Progresso Convites / Meta")
-        ]),
-        html.Div(className='kpi-card', children=[
-            html.H3("Volume Confirmações / Convites"),
-            html.P(formatar_numero(unidade['confirmados']), className='kpi-value'),
-            html.Small(f"Enviados: {formatar_numero(unidade['qtd_convites'])} | Eficiência: {unidade['media_confirmados']:.2%}")
-        ]),
-        html.Div(className='kpi-card', children=[
-            html.H3("Meta Confirmados"),
-            html.P(formatar_numero(unidade['meta_confirmados']), className='kpi-value'),
-            html.Small("Volume Esperado de Confirmações")
-        ]),
-        html.Div(className='kpi-card', children=[
-            html.H3("Ligações Efetuadas"),
-            html.P(formatar_numero(unidade['ligacoes_efetuadas']), className='kpi-value'),
-            html.Small(f"Confirmações: {formatar_numero(unidade['confirmacoes_ligacoes'])}")
-        ]),
-    ]
-    return children, {'display': 'grid'}
+def textos_rankings(metricas):
+    """Linhas de texto de cada ranking, indexadas pelo id do componente."""
+    return {
+        'kpi-top-3-confirmadas': [
+            f"{i+1}º {row['nome']}: {formatar_numero(row['confirmacoes_ligacoes'])} confirmações"
+            for i, row in enumerate(metricas.top5_confirmacoes)
+        ],
+        'kpi-bottom-3-convites': [
+            f"🐢 {row['nome']}: {formatar_numero(row['qtd_convites'])} convites"
+            for row in metricas.bottom5_convites
+        ],
+        # TOP 10 VENDEDORES QUE ENVIOU CONVITES (COM LOJA)
+        'kpi-top-10-convites': [
+            f"{i+1}º {row['vendedor_top_convites']} ({row['unidade_top_convites']}): {formatar_numero(row['qtd_top_convites'])} convites"
+            for i, row in enumerate(metricas.top10_convites)
+        ],
+        'kpi-bottom-5-confirmados': [
+            f"🐌 {row['nome']}: {formatar_numero(row['confirmados'])} confirmações"
+            for row in metricas.bottom5_confirmados
+        ],
+        'kpi-top-5-convites': [
+            f"🚀 {row['nome']}: {formatar_numero(row['qtd_convites'])} convites"
+            for row in metricas.top5_convites
+        ],
+        # TOP 10 VENDEDORES COM CONVITES CONFIRMADOS (COM LOJA)
+        'kpi-top-10-confirmados': [
+            f"{i+1}º {row['vendedor_confirmado']} ({row['unidade_confirmado']}): {formatar_numero(row['convites_confirmados'])} confirmados"
+            for i, row in enumerate(metricas.top10_confirmados)
+        ],
+    }
 
-@app.callback(
-    Output('kpi-top-3-confirmadas', 'children'),
-    Input('interval-update-data', 'n_intervals')
-)
-def atualizar_top5_confirmacoes(n):
-    df_local = carregar_dados()
-    if df_local.empty:
-        return []
-    top5 = df_local.sort_values(by='confirmacoes_ligacoes', ascending=False).head(5).reset_index(drop=True)
-    lista = []
-    for i, row in top5.iterrows():
-        texto = f"{i+1}º {row['nome']}: {int(row['confirmacoes_ligacoes'])} confirmações"
-        lista.append(html.Div(texto, style={"color": "#006600", "fontWeight": "600", "marginBottom": "6px"}))
-    return lista
+def detalhes_unidades_cliente(unidades):
+    """Valores do detalhe de cada unidade, já formatados, coluna a coluna.
 
+    Só os valores vão no snapshot; títulos, rodapés e classes dos cards ficam
+    em assets/dashboard.js, e as TVs não baixam texto repetido por unidade.
+    """
+    return {
+        'nome': unidades['nome'].astype(str).tolist(),
+        'progresso_convites': formatar_percentuais(unidades['progresso_convites']),
+        'confirmados': formatar_numeros(unidades['confirmados']),
+        'qtd_convites': formatar_numeros(unidades['qtd_convites']),
+        'media_confirmados': formatar_percentuais(unidades['media_confirmados']),
+        'meta_confirmados': formatar_numeros(unidades['meta_confirmados']),
+        'ligacoes_efetuadas': formatar_numeros(unidades['ligacoes_efetuadas']),
+        'confirmacoes_ligacoes': formatar_numeros(unidades['confirmacoes_ligacoes']),
+    }
+
+def gerar_snapshot_cliente(snapshot):
+    """JSON compacto com tudo que os callbacks do navegador precisam renderizar."""
+    metricas = snapshot.metricas
+    return {
+        'versao': snapshot.versao,
+        'kpis': textos_kpis(snapshot),
+        'unidades': metricas.unidades,
+        'rankings': textos_rankings(metricas),
+        'detalhes': detalhes_unidades_cliente(metricas.detalhes_unidades),
+    }
+
+def fonte_da_busca(busca):
+    """Nome da fonte no parâmetro ?fonte= da URL (a padrão se ausente ou desconhecida)."""
+    fonte = parse_qs((busca or "").lstrip("?")).get("fonte", [FONTE_PADRAO])[0]
+    return fonte if fonte in caches_dados else FONTE_PADRAO
+
+def snapshot_do_cliente(versao):
+    """Cache e snapshot da fonte em versao-dados, ao menos na versão do cliente.
+
+    O cliente pode ter recebido a versão de outro worker; se este ainda não a
+    leu do disco, sincroniza antes de renderizar (senão memoizaria a antiga).
+    """
+    fonte = versao[0] if versao else FONTE_PADRAO
+    cache = obter_cache(fonte)
+    snapshot = cache.obter_snapshot()
+    if versao and versao[1] > snapshot.versao:
+        cache.sincronizar()
+        snapshot = cache.obter_snapshot()
+    return fonte, cache, snapshot
+
+# Único callback de servidor disparado pelo aviso de nova versão (ou pelo
+# intervalo, sem o canal de eventos): publica o snapshot compacto no dcc.Store
+# quando há uma nova versão dos dados; se nada mudou, responde no_update e
+# nenhum outro callback é disparado.
+# versao-dados guarda [fonte, versão]: os demais callbacks sabem de qual
+# planilha é o snapshot exibido, e versões iguais de fontes diferentes não se
+# confundem.
 @app.callback(
-    Output('kpi-bottom-3-convites', 'children'),
-    Input('interval-update-data', 'n_intervals')
-)
-def atualizar_bottom5_convites(n):
-    df_local = carregar_dados()
-    if df_local.empty:
-        return []
-    bottom5 = df_local.sort_values(by='qtd_convites', ascending=True).head(5).reset_index(drop=True)
-    lista = []
-    for i, row in bottom5.iterrows():
-        texto = f"🐢 {row['nome']}: {int(row['qtd_convites'])} convites"
-        lista.append(html.Div(texto, style={"color": "#cc6600", "fontWeight": "600", "marginBottom": "6px"}))
-    return lista
-
-# =============================
-# ALTERAÇÃO 1
-# TOP 10 VENDEDORES QUE ENVIOU CONVITES (AGORA COM LOJA)
-# =============================
-@app.callback(
-    Output('kpi-top-10-convites', 'children'),
-    Input('interval-update-data', 'n_intervals')
+    Output('versao-dados', 'data'),
+    Output('snapshot-dados', 'data'),
+    Input('interval-update-data', 'n_intervals'),
+    Input('versao-servidor', 'data'),
+    Input('url', 'search'),
+    State('versao-dados', 'data')
 )
-def atualizar_top10_convites(n):
-    df_local = carregar_dados()
-    if df_local.empty:
-        return []
-
-    top10 = df_local.sort_values(by='qtd_top_convites', ascending=False).head(10).reset_index(drop=True)
-    
-    lista = []
-    for i, row in top10.iterrows():
-        texto = f"{i+1}º {row['vendedor_top_convites']} ({row['unidade_top_convites']}): {formatar_numero(row['qtd_top_convites'])} convites"
-        lista.append(html.Div(
-            texto,
-            style={"color": "#0066cc", "fontWeight": "600", "marginBottom": "6px"}
-        ))
-    return lista
+@telemetria.cronometrado("dashboard_callback_segundos", callback="publicar_snapshot")
+def publicar_snapshot(n, versao_servidor, busca, versao_cliente):
+    fonte = fonte_da_busca(busca)
+    cache = obter_cache(fonte)
+    snapshot = cache.obter_snapshot()
+    # O aviso pode ter vindo de outro worker, que já leu a versão nova do disco
+    if versao_servidor is not None and versao_servidor > snapshot.versao:
+        cache.sincronizar()
+        snapshot = cache.obter_snapshot()
+    if versao_cliente == [fonte, snapshot.versao]:
+        return dash.no_update, dash.no_update
+    return [fonte, snapshot.versao], memo_renderizacao.obter(
+        "publicar_snapshot", fonte, snapshot.versao, (),
+        lambda: gerar_snapshot_cliente(snapshot)
+    )
 
-@app.callback(
-    Output('kpi-bottom-5-confirmados', 'children'),
-    Input('interval-update-data', 'n_intervals')
+# Callbacks do navegador (assets/dashboard.js): KPIs, rankings e detalhe por
+# unidade são renderizados a partir do snapshot, sem requisições ao servidor
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='atualizar_kpis'),
+    Output('ultima-atualizacao', 'children'),
+    Output('kpi-total-convites', 'children'),
+    Output('kpi-total-confirmados', 'children'),
+    Output('kpi-meta-confirmados', 'children'),
+    Output('kpi-total-ligacoes', 'children'),
+    Output('kpi-progresso-geral', 'children'),
+    Output('kpi-taxa-confirmacao', 'children'),
+    Output('select-unidade', 'options'),
+    Output('unidade-evolucao', 'options'),
+    Input('snapshot-dados', 'data')
 )
-def atualizar_bottom5_confirmados(n):
-    df_local = carregar_dados()
-    if df_local.empty:
-        return []
-    bottom5 = df_local.sort_values(by='confirmados', ascending=True).head(5).reset_index(drop=True)
-    lista = []
-    for _, row in bottom5.iterrows():
-        texto = f"🐌 {row['nome']}: {int(row['confirmados'])} confirmações"
-        lista.append(html.Div(texto, style={"color": "#cc0000", "fontWeight": "600", "marginBottom": "6px"}))
-    return lista
 
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='atualizar_rankings'),
+    Output('kpi-top-10-convites', 'children'),
     Output('kpi-top-5-convites', 'children'),
-    Input('interval-update-data', 'n_intervals')
-)
-def atualizar_top5_envios_convites(n):
-    df_local = carregar_dados()
-    if df_local.empty:
-        return []
-    top5 = df_local.sort_values(by='qtd_convites', ascending=False).head(5).reset_index(drop=True)
-    lista = []
-    for i, row in top5.iterrows():
-        texto = f"🚀 {row['nome']}: {int(row['qtd_convites'])} convites"
-        lista.append(html.Div(texto, style={"color": "#009933", "fontWeight": "600", "marginBottom": "6px"}))
-    return lista
-
-# =============================
-# ALTERAÇÃO 2
-# TOP 10 VENDEDORES COM CONVITES CONFIRMADOS (AGORA COM LOJA)
-# =============================
-@app.callback(
+    Output('kpi-top-3-confirmadas', 'children'),
     Output('kpi-top-10-confirmados', 'children'),
-    Input('interval-update-data', 'n_intervals')
+    Output('kpi-bottom-3-convites', 'children'),
+    Output('kpi-bottom-5-confirmados', 'children'),
+    Input('snapshot-dados', 'data')
 )
-def atualizar_top10_confirmados(n):
-    df_local = carregar_dados()
-    if df_local.empty:
-        return []
-
-    top10_confirmados = df_local.sort_values(by='convites_confirmados', ascending=False).head(10).reset_index(drop=True)
-    
-    lista = []
-    for i, row in top10_confirmados.iterrows():
-        texto = f"{i+1}º {row['vendedor_confirmado']} ({row['unidade_confirmado']}): {int(row['convites_confirmados'])} confirmados"
-        lista.append(html.Div(
-            texto,
-            style={"color": "#006600", "fontWeight": "600", "marginBottom": "6px"}
-        ))
-    return lista
 
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='exibir_detalhe_unidade'),
+    Output('detalhe-unidade', 'children'),
+    Output('detalhe-unidade', 'style'),
+    Input('select-unidade', 'value'),
+    Input('snapshot-dados', 'data')
+)
+
+# ==========================
+# GRÁFICOS DE EVOLUÇÃO
+# ==========================
+ROTULOS_HISTORICO = {
+    "qtd_convites": "Convites",
+    "confirmados": "Confirmados",
+    "ligacoes_efetuadas": "Ligações",
+}
+
+def _estilizar(figura, titulo):
+    figura.update_layout(
+        title=titulo, template='plotly_dark', paper_bgcolor='#1a1a1a', plot_bgcolor='#1a1a1a',
+        margin={'l': 50, 'r': 20, 't': 50, 'b': 40}, height=360,
+        legend={'orientation': 'h', 'y': -0.15}, separators=',.',
+    )
+    return figura
+
+def _figura_vazia(titulo):
+    figura = go.Figure()
+    figura.add_annotation(
+        text="Ainda não há histórico suficiente", showarrow=False,
+        xref='paper', yref='paper', x=0.5, y=0.5, font={'color': '#aaaaaa'}
+    )
+    figura.update_xaxes(visible=False)
+    figura.update_yaxes(visible=False)
+    return _estilizar(figura, titulo)
+
+def figura_evolucao(serie, colunas, titulo):
+    """Linhas em degrau: o valor só muda quando um snapshot novo muda a planilha."""
+    if len(serie) < 2:
+        return _figura_vazia(titulo)
+    figura = go.Figure([
+        go.Scatter(
+            x=serie['capturado_em'], y=serie[coluna], name=ROTULOS_HISTORICO[coluna],
+            mode='lines', line={'shape': 'hv', 'color': cor},
+        )
+        for coluna, cor in colunas
+    ])
+    return _estilizar(figura, titulo)
+
+def figura_crescimento(crescimento, titulo):
+    """Bolhas por unidade: convites (x), confirmados (y) e ligações (tamanho) no período."""
+    if crescimento.empty or not crescimento['qtd_convites'].any():
+        return _figura_vazia(titulo)
+    ligacoes = crescimento['ligacoes_efetuadas']
+    figura = go.Figure(go.Scatter(
+        x=crescimento['qtd_convites'], y=crescimento['confirmados'],
+        text=crescimento.index, mode='markers',
+        marker={
+            'size': ligacoes, 'sizemode': 'area', 'sizemin': 4,
+            'sizeref': 2.0 * max(ligacoes.max(), 1) / 40 ** 2, 'color': '#ffd700', 'opacity': 0.7,
+        },
+        hovertemplate="%{text}<br>Convites: %{x}<br>Confirmados: %{y}<br>Ligações: %{marker.size}<extra></extra>",
+    ))
+    figura.update_xaxes(title="Convites enviados no período")
+    figura.update_yaxes(title="Confirmações no período")
+    return _estilizar(figura, titulo)
+
+def gerar_graficos_evolucao(historico, unidade=None):
+    """Figuras dos três gráficos de evolução (totais ou da unidade selecionada)."""
+    escopo = unidade or "Todas as unidades"
+    serie = historico.serie(unidade, JANELA_HISTORICO_DIAS, PONTOS_GRAFICO_HISTORICO)
+    return (
+        figura_evolucao(
+            serie, [('qtd_convites', '#0066cc'), ('confirmados', '#4caf50')],
+            f"Convites e confirmações: {escopo}"
+        ),
+        figura_evolucao(serie, [('ligacoes_efetuadas', '#ffd700')], f"Ligações efetuadas: {escopo}"),
+        figura_crescimento(
+            historico.crescimento_unidades(JANELA_HISTORICO_DIAS),
+            "Crescimento por unidade no período (30 que mais enviaram convites)"
+        ),
+    )
+
+# Só registrado com o histórico ativo; a unidade vem do dropdown da própria
+# seção, e o detalhe da unidade (select-unidade) continua sem ir ao servidor
+if HISTORICO_ATIVO:
+    @app.callback(
+        Output('grafico-evolucao-convites', 'figure'),
+        Output('grafico-evolucao-ligacoes', 'figure'),
+        Output('grafico-crescimento-unidades', 'figure'),
+        Input('versao-dados', 'data'),
+        Input('unidade-evolucao', 'value'),
+    )
+    @telemetria.cronometrado("dashboard_callback_segundos", callback="atualizar_graficos_evolucao")
+    def atualizar_graficos_evolucao(versao, unidade):
+        if versao is None:
+            raise dash.exceptions.PreventUpdate
+        fonte, cache, snapshot = snapshot_do_cliente(versao)
+        return memo_renderizacao.obter(
+            "atualizar_graficos_evolucao", fonte, snapshot.versao, (unidade,),
+            lambda: gerar_graficos_evolucao(cache.historico, unidade)
+        )
+
+# Os links de exportação levam a fonte da página
+app.clientside_callback(
+    ClientsideFunction(namespace='dashboard', function_name='links_exportacao'),
+    Output('exportar-dados-csv', 'href'),
+    Output('exportar-dados-xlsx', 'href'),
+    Output('exportar-rankings-csv', 'href'),
+    Output('exportar-rankings-xlsx', 'href'),
+    Input('url', 'search')
+)
 
 # ==========================
 # CALLBACK: Tabela Geral
 # ==========================
+# Apenas a página visível é serializada e enviada ao navegador
 @app.callback(
     Output('tabela-geral-dados', 'children'),
-    Input('interval-update-data', 'n_intervals')
+    Output('pagina-tabela', 'data'),
+    Output('info-pagina-tabela', 'children'),
+    Input('versao-dados', 'data'),
+    Input('filtro-tabela', 'value'),
+    Input('ordenar-tabela', 'value'),
+    Input('direcao-tabela', 'value'),
+    Input('pagina-anterior', 'n_clicks'),
+    Input('pagina-seguinte', 'n_clicks'),
+    State('pagina-tabela', 'data')
 )
-def atualizar_tabela(n):
-    df_local = carregar_dados()
-    return gerar_tabela_formatada(df_local)
+@telemetria.cronometrado("dashboard_callback_segundos", callback="atualizar_tabela")
+def atualizar_tabela(versao, filtro, ordenar_por, direcao, _anterior, _seguinte, pagina):
+    gatilho = dash.ctx.triggered_id
+    if gatilho == 'pagina-anterior':
+        pagina = (pagina or 0) - 1
+    elif gatilho == 'pagina-seguinte':
+        pagina = (pagina or 0) + 1
+    elif gatilho in ('filtro-tabela', 'ordenar-tabela', 'direcao-tabela'):
+        pagina = 0
+
+    fonte, _, snapshot = snapshot_do_cliente(versao)
+
+    def renderizar():
+        df_pagina, pagina_atual, total_paginas, total_linhas = consultar_tabela(
+            snapshot.df, filtro, ordenar_por, direcao != 'asc', pagina
+        )
+        info = f"Página {pagina_atual + 1} de {total_paginas} ({formatar_numero(total_linhas)} unidades)"
+        return gerar_tabela_formatada(df_pagina), pagina_atual, info
+
+    return memo_renderizacao.obter(
+        "atualizar_tabela", fonte, snapshot.versao, (filtro, ordenar_por, direcao, pagina), renderizar
+    )
+
+# ==========================
+# CANAL DE EVENTOS (Server-Sent Events)
+# ==========================
+# Cada navegador mantém uma conexão aberta em /eventos e recebe a versão dos
+# dados assim que o atualizador troca o snapshot; só então pede o snapshot
+# novo. Com o gunicorn, use workers com threads (gthread, ver Procfile): cada
+# conexão aberta ocupa uma thread durante até DURACAO_EVENTOS_SEGUNDOS.
+#
+# Dimensionamento: cada worker aceita até MAXIMO_CONEXOES_EVENTOS conexões e
+# responde 503 às seguintes (o navegador volta ao dcc.Interval e tenta o canal
+# de novo mais tarde). As demais threads do worker atendem os callbacks, então
+# use --threads >= MAXIMO_CONEXOES_EVENTOS + 16 e --workers suficientes para
+# workers x MAXIMO_CONEXOES_EVENTOS >= número de telas abertas. O Procfile
+# (2 workers x 64 threads, 48 conexões por worker) comporta 96 telas.
+# Intervalo (em segundos) dos comentários que mantêm a conexão viva em proxies
+INTERVALO_PING_EVENTOS_SEGUNDOS = float(os.environ.get("INTERVALO_PING_EVENTOS_SEGUNDOS", 25))
+# Duração máxima de cada conexão; o navegador reconecta sozinho em seguida,
+# o que redistribui as conexões entre os workers
+DURACAO_EVENTOS_SEGUNDOS = float(os.environ.get("DURACAO_EVENTOS_SEGUNDOS", 10 * 60))
+MAXIMO_CONEXOES_EVENTOS = int(os.environ.get("MAXIMO_CONEXOES_EVENTOS", "48"))
+
+class VagasEventos:
+    """Conexões de /eventos abertas neste worker, limitadas a um máximo."""
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self.abertas = 0
+        self._lock = threading.Lock()
+
+    def ocupar(self):
+        with self._lock:
+            if self.abertas >= self.maximo:
+                return False
+            self.abertas += 1
+            return True
+
+    def liberar(self):
+        with self._lock:
+            self.abertas -= 1
+
+vagas_eventos = VagasEventos(MAXIMO_CONEXOES_EVENTOS)
+
+def _stream_eventos(cache):
+    fim = time.monotonic() + DURACAO_EVENTOS_SEGUNDOS
+    versao = cache.obter_snapshot().versao
+    telemetria.incrementar("dashboard_eventos_conexoes_total")
+    yield f"retry: 5000\nevent: versao\ndata: {versao}\n\n"
+    while True:
+        restante = fim - time.monotonic()
+        if restante <= 0:
+            return
+        nova = cache.aguardar_versao(versao, min(INTERVALO_PING_EVENTOS_SEGUNDOS, restante))
+        if nova == versao:
+            yield ": ping\n\n"
+            continue
+        versao = nova
+        telemetria.incrementar("dashboard_eventos_enviados_total")
+        yield f"event: versao\ndata: {versao}\n\n"
+
+@server.route(app.config.routes_pathname_prefix + "eventos")
+def eventos():
+    cache = obter_cache(flask.request.args.get("fonte"))
+    if not vagas_eventos.ocupar():
+        # Sem thread livre para mais uma conexão longa: o cliente usa o intervalo
+        telemetria.incrementar("dashboard_eventos_recusados_total")
+        return flask.Response(
+            "Canal de eventos lotado\n", status=503, mimetype="text/plain",
+            headers={"Retry-After": str(int(DURACAO_EVENTOS_SEGUNDOS))},
+        )
+    resposta = flask.Response(
+        _stream_eventos(cache), mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Chamado pelo servidor ao fim da resposta, inclusive se o cliente cair
+    resposta.call_on_close(vagas_eventos.liberar)
+    return resposta
+
+# ==========================
+# EXPORTAÇÃO (CSV / XLSX) DO SNAPSHOT ATUAL
+# ==========================
+# Os arquivos são gerados uma vez por versão dos dados em DIRETORIO_EXPORTACOES
+# (compartilhado entre os workers); downloads repetidos da mesma versão leem o
+# arquivo pronto. Nada é montado inteiro em memória: o CSV é escrito e enviado
+# em blocos e o XLSX é gerado no modo write-only do openpyxl.
+DIRETORIO_EXPORTACOES = os.environ.get(
+    "DIRETORIO_EXPORTACOES", os.path.join(DIRETORIO_DADOS, "exportacoes")
+)
+LINHAS_POR_BLOCO_EXPORTACAO = 5000
+TIPOS_EXPORTACAO = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# (título, campo em Metricas, coluna do nome, coluna da unidade, coluna do valor)
+RANKINGS_EXPORTACAO = [
+    ("Top 5 lojas com mais confirmações", "top5_confirmacoes", "nome", None, "confirmacoes_ligacoes"),
+    ("Top 5 lojas que mais enviaram convites", "top5_convites", "nome", None, "qtd_convites"),
+    ("Top 5 lojas que menos enviaram convites", "bottom5_convites", "nome", None, "qtd_convites"),
+    ("Top 5 lojas com menos confirmações", "bottom5_confirmados", "nome", None, "confirmados"),
+    ("Top 10 vendedores que enviaram convites", "top10_convites",
+     "vendedor_top_convites", "unidade_top_convites", "qtd_top_convites"),
+    ("Top 10 vendedores com convites confirmados", "top10_confirmados",
+     "vendedor_confirmado", "unidade_confirmado", "convites_confirmados"),
+]
+
+def tabela_rankings(metricas):
+    """Todos os rankings em uma tabela só: ranking, posição, nome, unidade e valor."""
+    linhas = [
+        (titulo, posicao, registro[nome], registro[unidade] if unidade else None, registro[valor])
+        for titulo, campo, nome, unidade, valor in RANKINGS_EXPORTACAO
+        for posicao, registro in enumerate(getattr(metricas, campo), start=1)
+    ]
+    return pd.DataFrame(linhas, columns=["ranking", "posicao", "nome", "unidade", "valor"])
+
+def _tabela_exportacao(snapshot, conteudo):
+    return snapshot.df if conteudo == "dados" else tabela_rankings(snapshot.metricas)
+
+def _blocos(df):
+    for inicio in range(0, len(df), LINHAS_POR_BLOCO_EXPORTACAO):
+        yield df.iloc[inicio:inicio + LINHAS_POR_BLOCO_EXPORTACAO]
+
+def _blocos_csv(df):
+    """CSV para o Excel em português: separador ';', vírgula decimal e BOM UTF-8."""
+    yield b"\xef\xbb\xbf" + ";".join(df.columns).encode("utf-8") + b"\r\n"
+    for bloco in _blocos(df):
+        yield bloco.to_csv(sep=";", decimal=",", index=False, header=False, lineterminator="\r\n").encode("utf-8")
+
+def _gravar_xlsx(df, caminho, titulo):
+    # Write-only: as linhas vão direto para o arquivo, sem manter a planilha em memória
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet(title=titulo)
+    planilha.append(list(df.columns))
+    for bloco in _blocos(df):
+        # Vazios viram células em branco (o Excel não aceita NaN)
+        bloco = bloco.astype(object).where(bloco.notna(), None)
+        for linha in bloco.itertuples(index=False, name=None):
+            planilha.append(linha)
+    livro.save(caminho)
+
+def _remover_versoes_antigas(prefixo, versao):
+    """Apaga os arquivos prontos de versões anteriores ("<prefixo>v<k>.<formato>").
+
+    Os .tmp ficam: podem ser de um download de outra versão ainda em andamento.
+    """
+    for nome in os.listdir(DIRETORIO_EXPORTACOES):
+        if not nome.startswith(prefixo):
+            continue
+        versao_arquivo, _, formato = nome[len(prefixo):].partition(".")
+        if formato in TIPOS_EXPORTACAO and versao_arquivo != f"v{versao}":
+            try:
+                os.remove(os.path.join(DIRETORIO_EXPORTACOES, nome))
+            except OSError:
+                pass
+
+def _stream_gravando(blocos, caminho):
+    """Envia os blocos ao cliente e grava o arquivo da versão ao mesmo tempo."""
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    completo = False
+    try:
+        with open(temporario, "wb") as f:
+            for bloco in blocos:
+                f.write(bloco)
+                yield bloco
+        completo = True
+        try:
+            os.replace(temporario, caminho)
+        except FileNotFoundError:
+            pass  # o .tmp foi apagado por fora: o download já saiu, só não vira cache
+    finally:
+        # Download interrompido: o arquivo parcial não vira cache
+        if not completo and os.path.exists(temporario):
+            os.remove(temporario)
+
+_locks_exportacao = {}
+_lock_exportacao = threading.Lock()
+
+@server.route(app.config.routes_pathname_prefix + "exportar/<conteudo>.<formato>")
+def exportar(conteudo, formato):
+    if conteudo not in ("dados", "rankings") or formato not in TIPOS_EXPORTACAO:
+        flask.abort(404)
+    fonte = fonte_da_busca(flask.request.query_string.decode())
+    snapshot = obter_cache(fonte).obter_snapshot()
+    os.makedirs(DIRETORIO_EXPORTACOES, exist_ok=True)
+    # Nomes de fonte não têm ponto, então um prefixo não casa com o de outra fonte
+    prefixo = f"{conteudo}.{fonte}."
+    nome_arquivo = f"{prefixo}v{snapshot.versao}.{formato}"
+    caminho = os.path.join(DIRETORIO_EXPORTACOES, nome_arquivo)
+    download = f"primavia-{fonte}-{conteudo}-v{snapshot.versao}.{formato}"
+
+    if not os.path.exists(caminho):
+        telemetria.incrementar("dashboard_exportacoes_total", arquivo=f"{conteudo}.{formato}", resultado="miss")
+        _remover_versoes_antigas(prefixo, snapshot.versao)
+        df = _tabela_exportacao(snapshot, conteudo)
+        if formato == "csv":
+            return flask.Response(
+                _stream_gravando(_blocos_csv(df), caminho), mimetype=TIPOS_EXPORTACAO[formato],
+                headers={"Content-Disposition": f"attachment; filename={download}"},
+            )
+        # O XLSX (um zip) só pode ser enviado depois de pronto: gerado uma vez por versão
+        with _lock_exportacao:
+            lock = _locks_exportacao.setdefault(caminho, threading.Lock())
+        with lock:
+            try:
+                if not os.path.exists(caminho):
+                    temporario = f"{caminho}.{os.getpid()}.tmp"
+                    _gravar_xlsx(df, temporario, conteudo)
+                    os.replace(temporario, caminho)
+            finally:
+                # Com o arquivo pronto a trava não serve mais (as próximas
+                # requisições veem o arquivo); quem ainda espera nela só relê
+                with _lock_exportacao:
+                    _locks_exportacao.pop(caminho, None)
+    else:
+        telemetria.incrementar("dashboard_exportacoes_total", arquivo=f"{conteudo}.{formato}", resultado="hit")
+    return flask.send_file(
+        caminho, mimetype=TIPOS_EXPORTACAO[formato], as_attachment=True, download_name=download
+    )
+
+# ==========================
+# COMPRESSÃO DAS RESPOSTAS DO DASH
+# ==========================
+# O JSON dos callbacks (tabela, snapshot, gráficos) é muito repetitivo e
+# comprime de 5 a 15 vezes; as TVs das lojas costumam estar em Wi-Fi fraco
+COMPRESSAO_ATIVA = os.environ.get("COMPRESSAO_ATIVA", "1") == "1"
+COMPRESSAO_MINIMO_BYTES = int(os.environ.get("COMPRESSAO_MINIMO_BYTES", "500"))
+NIVEL_GZIP = int(os.environ.get("NIVEL_GZIP", "6"))
+QUALIDADE_BROTLI = int(os.environ.get("QUALIDADE_BROTLI", "5"))
+ROTAS_COMPRIMIDAS = ("/_dash-update-component", "/_dash-layout", "/_dash-dependencies")
+# Todas as TVs recebem o mesmo snapshot a cada versão: o corpo comprimido é
+# guardado pelo hash e a compressão roda uma vez por versão, não por cliente
+COMPRESSOES_GUARDADAS = int(os.environ.get("COMPRESSOES_GUARDADAS", "32"))
+_compressoes = OrderedDict()
+_lock_compressoes = threading.Lock()
+
+def _codificacao_aceita():
+    """Melhor codificação aceita pelo navegador: 'br', 'gzip' ou None."""
+    aceitas = flask.request.accept_encodings
+    if brotli is not None and aceitas["br"]:
+        return "br"
+    if aceitas["gzip"]:
+        return "gzip"
+    return None
+
+def _comprimir(corpo, codificacao):
+    chave = (codificacao, hashlib.blake2b(corpo, digest_size=16).digest())
+    with _lock_compressoes:
+        comprimido = _compressoes.get(chave)
+        if comprimido is not None:
+            _compressoes.move_to_end(chave)
+            telemetria.incrementar("dashboard_compressao_total", codificacao=codificacao, resultado="hit")
+            return comprimido
+    with telemetria.medir("dashboard_compressao_segundos", codificacao=codificacao):
+        if codificacao == "br":
+            comprimido = brotli.compress(corpo, quality=QUALIDADE_BROTLI)
+        else:
+            comprimido = gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0)
+    telemetria.incrementar("dashboard_compressao_total", codificacao=codificacao, resultado="miss")
+    with _lock_compressoes:
+        _compressoes[chave] = comprimido
+        while len(_compressoes) > COMPRESSOES_GUARDADAS:
+            _compressoes.popitem(last=False)
+    return comprimido
+
+def comprimir_resposta(resposta):
+    """Comprime em gzip/brotli a resposta JSON do Dash, quando vale a pena."""
+    if (
+        not COMPRESSAO_ATIVA
+        or not flask.request.path.endswith(ROTAS_COMPRIMIDAS)
+        or resposta.status_code != 200
+        or resposta.direct_passthrough
+        or resposta.is_streamed
+        or "Content-Encoding" in resposta.headers
+    ):
+        return resposta
+    resposta.vary.add("Accept-Encoding")
+    codificacao = _codificacao_aceita()
+    corpo = resposta.get_data()
+    if codificacao is None or len(corpo) < COMPRESSAO_MINIMO_BYTES:
+        return resposta
+    resposta.set_data(_comprimir(corpo, codificacao))
+    resposta.headers["Content-Encoding"] = codificacao
+    return resposta
+
+# ==========================
+# MÉTRICAS DE DESEMPENHO E PERFIL POR REQUISIÇÃO
+# ==========================
+# Com PERFIL_REQUISICOES=1 cada requisição é perfilada com cProfile e o
+# resultado gravado em DIRETORIO_PERFIS (abra com python -m pstats <arquivo>)
+PERFIL_REQUISICOES = os.environ.get("PERFIL_REQUISICOES", "0") == "1"
+DIRETORIO_PERFIS = os.environ.get("DIRETORIO_PERFIS", os.path.join(DIRETORIO_DADOS, "perfis"))
+# Só um cProfile pode estar ativo por processo (no Python >= 3.12 um segundo
+# enable() levanta ValueError): com workers gthread, requisições simultâneas
+# à perfilada seguem sem perfil
+_lock_perfil = threading.Lock()
+
+def _nome_callback():
+    """Nome da função de callback chamada pela requisição atual do Dash."""
+    corpo = flask.request.get_json(silent=True) or {}
+    callback = app.callback_map.get(corpo.get("output"), {}).get("callback")
+    return getattr(callback, "__name__", None) or "desconhecido"
+
+@server.before_request
+def _iniciar_medicao():
+    flask.g.inicio_requisicao = time.perf_counter()
+    if PERFIL_REQUISICOES and _lock_perfil.acquire(blocking=False):
+        flask.g.perfil = cProfile.Profile()
+        flask.g.perfil.enable()
+
+@server.teardown_request
+def _encerrar_perfil(_erro):
+    # Normalmente o perfil é encerrado em _registrar_medicao; isto só cobre
+    # requisições que falharam antes, para o lock não ficar preso
+    perfil = flask.g.pop("perfil", None)
+    if perfil is not None:
+        perfil.disable()
+        _lock_perfil.release()
+
+@server.after_request
+def _registrar_medicao(resposta):
+    # Só o JSON dos callbacks é medido: ler o tamanho de uma resposta em
+    # streaming (/eventos, exportações) consumiria o gerador antes do envio
+    callback = flask.request.path.endswith("/_dash-update-component")
+    em_streaming = resposta.is_streamed or resposta.direct_passthrough
+    bytes_json = 0 if em_streaming else resposta.calculate_content_length() or 0
+    resposta = comprimir_resposta(resposta)
+    duracao = time.perf_counter() - flask.g.get("inicio_requisicao", time.perf_counter())
+    perfil = flask.g.pop("perfil", None)
+    if perfil is not None:
+        perfil.disable()
+        _lock_perfil.release()
+    if callback and not em_streaming:
+        rotulo = _nome_callback()
+        # Inclui execução do callback, serialização JSON, compressão e overhead
+        # do Dash; comparar com dashboard_callback_segundos dá o custo do resto
+        telemetria.registrar_tempo("dashboard_requisicao_segundos", duracao, callback=rotulo)
+        telemetria.incrementar("dashboard_resposta_bytes_total", bytes_json, callback=rotulo)
+        # Bytes que de fato trafegam (iguais aos do JSON quando não há compressão)
+        telemetria.incrementar(
+            "dashboard_resposta_bytes_enviados_total", len(resposta.get_data()),
+            callback=rotulo
+        )
+    else:
+        rotulo = flask.request.endpoint or "estatico"
+        telemetria.registrar_tempo("dashboard_requisicao_segundos", duracao, rota=rotulo)
+    if perfil is not None:
+        os.makedirs(DIRETORIO_PERFIS, exist_ok=True)
+        # O Dash usa o próprio caminho como endpoint ("/", "/_dash-layout"...)
+        nome = rotulo.strip("/").replace("/", "_") or "index"
+        perfil.dump_stats(os.path.join(
+            DIRETORIO_PERFIS, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{nome}.prof"
+        ))
+    return resposta
+
+@server.route("/metrics")
+def metricas_prometheus():
+    medidores = [
+        ("dashboard_memo_renderizacao_itens", {}, len(memo_renderizacao)),
+        ("dashboard_eventos_conexoes_abertas", {}, vagas_eventos.abertas),
+    ]
+    for fonte, cache in caches_dados.items():
+        estatisticas = cache.estatisticas()
+        snapshot = cache.snapshot_atual
+        idade = (
+            (datetime.now(FUSO_HORARIO) - snapshot.atualizado_em).total_seconds()
+            if snapshot.atualizado_em else -1
+        )
+        rotulos = {"fonte": fonte}
+        medidores += [
+            ("dashboard_cache_hit_ratio", rotulos, round(estatisticas["hit_ratio"], 6)),
+            ("dashboard_snapshot_versao", rotulos, snapshot.versao),
+            ("dashboard_snapshot_linhas", rotulos, len(snapshot.df)),
+            ("dashboard_snapshot_idade_segundos", rotulos, round(idade, 3)),
+            ("dashboard_planilha_ultima_busca_falhou", rotulos, int(snapshot.erro is not None)),
+            ("dashboard_planilha_falhas_seguidas", rotulos, estatisticas["falhas_seguidas"]),
+        ]
+    return flask.Response(
+        telemetria.exportar(medidores), mimetype="text/plain; version=0.0.4"
+    )
 
 # ==========================
 # RODAR APP
@@ -0,0 +1,88 @@
+// Callbacks do navegador: renderizam KPIs, rankings e o detalhe por unidade
+// a partir do snapshot publicado pelo servidor no dcc.Store 'snapshot-dados'.
+
+// Ordem dos rankings igual à dos Outputs em app.py; as cores ficam em style.css
+var RANKINGS = [
+    ['kpi-top-10-convites', 'ranking-item ranking-azul'],
+    ['kpi-top-5-convites', 'ranking-item ranking-verde'],
+    ['kpi-top-3-confirmadas', 'ranking-item ranking-verde-escuro'],
+    ['kpi-top-10-confirmados', 'ranking-item ranking-verde-escuro'],
+    ['kpi-bottom-3-convites', 'ranking-item ranking-laranja'],
+    ['kpi-bottom-5-confirmados', 'ranking-item ranking-vermelho']
+];
+
+function componente(tipo, props) {
+    return {type: tipo, namespace: 'dash_html_components', props: props};
+}
+
+function cardKpi(classe, titulo, valor, rodape) {
+    return componente('Div', {className: classe, children: [
+        componente('H3', {children: titulo}),
+        componente('P', {children: valor, className: 'kpi-value'}),
+        componente('Small', {children: rodape})
+    ]});
+}
+
+// Cards do detalhe da unidade na posição i das colunas de snapshot.detalhes
+function cardsDetalhe(detalhes, i) {
+    return [
+        cardKpi('kpi-card highlight', detalhes.nome[i], detalhes.progresso_convites[i],
+                'Progresso Convites / Meta'),
+        cardKpi('kpi-card', 'Volume Confirmações / Convites', detalhes.confirmados[i],
+                'Enviados: ' + detalhes.qtd_convites[i] +
+                ' | Eficiência: ' + detalhes.media_confirmados[i]),
+        cardKpi('kpi-card', 'Meta Confirmados', detalhes.meta_confirmados[i],
+                'Volume Esperado de Confirmações'),
+        cardKpi('kpi-card', 'Ligações Efetuadas', detalhes.ligacoes_efetuadas[i],
+                'Confirmações: ' + detalhes.confirmacoes_ligacoes[i])
+    ];
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        atualizar_kpis: function(snapshot) {
+            if (!snapshot) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            var opcoes = snapshot.unidades.map(function(nome) {
+                return {label: nome, value: nome};
+            });
+            // Mesmas opções no detalhe da unidade e no filtro dos gráficos de evolução
+            return snapshot.kpis.concat([opcoes, opcoes]);
+        },
+
+        atualizar_rankings: function(snapshot) {
+            if (!snapshot) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return RANKINGS.map(function(ranking) {
+                var classe = ranking[1];
+                return (snapshot.rankings[ranking[0]] || []).map(function(texto) {
+                    return componente('Div', {children: texto, className: classe});
+                });
+            });
+        },
+
+        exibir_detalhe_unidade: function(unidade, snapshot) {
+            if (!unidade || !snapshot) {
+                return ['', {display: 'none'}];
+            }
+            var i = snapshot.detalhes.nome.indexOf(unidade);
+            if (i < 0) {
+                // A unidade pode ter saído da planilha entre uma atualização e outra
+                return [
+                    cardKpi('kpi-card warning-card', unidade, 'Unidade não encontrada',
+                            'A unidade não está presente nos dados atuais'),
+                    {display: 'grid'}
+                ];
+            }
+            return [cardsDetalhe(snapshot.detalhes, i), {display: 'grid'}];
+        },
+
+        links_exportacao: function(busca) {
+            return ['dados.csv', 'dados.xlsx', 'rankings.csv', 'rankings.xlsx'].map(function(arquivo) {
+                return 'exportar/' + arquivo + (busca || '');
+            });
+        }
+    }
+});
@@ -0,0 +1,60 @@
+// Canal de eventos do servidor (/eventos): avisa a versão dos dados assim que
+// ela muda, e o callback publicar_snapshot busca o snapshot novo. Enquanto o
+// canal estiver desconectado, o dcc.Interval volta a consultar o servidor.
+// Se o servidor recusar a conexão (503, canal lotado), o navegador não
+// reconecta sozinho: uma nova tentativa é agendada depois de alguns minutos.
+
+// Espera (ms) antes de tentar o canal de novo após uma recusa
+var ESPERA_RECONEXAO_EVENTOS = 5 * 60 * 1000;
+
+(function() {
+    if (!window.EventSource) {
+        return;
+    }
+    var ultimaVersao = null;
+
+    function atualizar(id, props) {
+        var clientside = window.dash_clientside;
+        if (!clientside || !clientside.set_props) {
+            return false;
+        }
+        try {
+            clientside.set_props(id, props);
+            return true;
+        } catch (e) {
+            return false;
+        }
+    }
+
+    function conectar() {
+        // set_props só funciona depois que o Dash montou o layout
+        if (!document.getElementById('ultima-atualizacao')) {
+            setTimeout(conectar, 200);
+            return;
+        }
+        var config = JSON.parse(document.getElementById('_dash-config').textContent);
+        var fonte = new EventSource(
+            config.requests_pathname_prefix + 'eventos' + window.location.search
+        );
+
+        fonte.onopen = function() {
+            atualizar('interval-update-data', {disabled: true});
+        };
+        fonte.onerror = function() {
+            // O navegador reconecta sozinho (retry enviado pelo servidor)
+            atualizar('interval-update-data', {disabled: false});
+            if (fonte.readyState === EventSource.CLOSED) {
+                // Recusada: espalha as novas tentativas das telas no tempo
+                setTimeout(conectar, ESPERA_RECONEXAO_EVENTOS * (1 + Math.random()));
+            }
+        };
+        fonte.addEventListener('versao', function(evento) {
+            var versao = parseInt(evento.data, 10);
+            if (versao !== ultimaVersao && atualizar('versao-servidor', {data: versao})) {
+                ultimaVersao = versao;
+            }
+        });
+    }
+
+    window.addEventListener('load', conectar);
+})();
@@ -0,0 +1 @@
+"""Benchmarks offline do dashboard (planilha local + dados sintéticos)."""
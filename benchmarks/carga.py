@@ -0,0 +1,364 @@
+"""Teste de carga: uma frota de TVs e gerentes contra o app no gunicorn.
+
+Sobe a planilha local (benchmarks.planilha_local) no lugar do Google Sheets,
+inicia o app no gunicorn com N workers e reproduz o tráfego de callbacks do
+Dash de cada tela: carga inicial (página, layout, dependências, snapshot,
+tabela e gráficos), um tick do dcc.Interval a cada --intervalo segundos e, nos
+gerentes, trocas da unidade no filtro dos gráficos de evolução
+('unidade-evolucao') e da página da tabela. O dropdown de detalhe
+('select-unidade') é clientside e não gera requisições.
+
+Com --eventos cada TV faz como o navegador de produção: mantém /eventos
+aberto (ocupando uma thread do worker) e só chama publicar_snapshot quando
+chega um aviso de versão; se o canal for recusado (503, limite
+MAXIMO_CONEXOES_EVENTOS), volta ao intervalo. As recusas aparecem como erros
+do tipo "eventos". Os gerentes continuam no intervalo.
+
+    python -m benchmarks.carga
+    python -m benchmarks.carga --workers 4 --tvs 10 50 100 --duracao 60 --json carga.json
+    python -m benchmarks.carga --eventos --workers 2 --tvs 50 100
+
+Cada valor de --tvs é uma rodada. Para cada rodada são reportados a vazão, os
+percentis de latência por tipo de requisição e as buscas à planilha por tick
+do intervalo, que devem ficar constantes com o aumento de clientes (o
+atualizador e a eleição de líder garantem uma busca por TTL em todo o app).
+O gerador roda em threads de um único processo; para centenas de telas,
+acompanhe o uso de CPU dele para não medir o próprio cliente.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+from benchmarks.executar import corpo_callback
+from benchmarks.planilha_local import iniciar_servidor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAIDAS_PUBLICAR = [("versao-dados", "data"), ("snapshot-dados", "data")]
+SAIDAS_TABELA = [
+    ("tabela-geral-dados", "children"), ("pagina-tabela", "data"),
+    ("info-pagina-tabela", "children"),
+]
+SAIDAS_GRAFICOS = [
+    ("grafico-evolucao-convites", "figure"), ("grafico-evolucao-ligacoes", "figure"),
+    ("grafico-crescimento-unidades", "figure"),
+]
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_gunicorn(porta, workers, threads, keep_alive, ambiente, log):
+    """Inicia o app no gunicorn e espera até ele responder (ou falha em 60 s)."""
+    # O keep-alive padrão (2 s) fecha a conexão de cada tela entre dois ticks
+    # e o POST seguinte falha com "connection reset" ao reutilizá-la
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:server", "--workers", str(workers),
+         "--worker-class", "gthread", "--threads", str(threads),
+         "--keep-alive", str(keep_alive), "--bind", f"127.0.0.1:{porta}"],
+        cwd=RAIZ, env={**os.environ, **ambiente}, stdout=log, stderr=subprocess.STDOUT,
+    )
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"gunicorn terminou com código {processo.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{porta}/_dash-layout", timeout=2).ok:
+                return processo
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    processo.kill()
+    raise RuntimeError("gunicorn não respondeu em 60 s")
+
+
+class Medicoes:
+    """Latências (ms) e erros por tipo de requisição, compartilhados entre as telas."""
+
+    def __init__(self):
+        self.tempos = {}
+        self.erros = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo, ms, ok):
+        with self._lock:
+            self.tempos.setdefault(tipo, []).append(ms)
+            if not ok:
+                self.erros[tipo] = self.erros.get(tipo, 0) + 1
+
+
+class Tela:
+    """Uma TV (ou o navegador de um gerente) com o estado dos Stores do Dash."""
+
+    def __init__(self, base, medicoes):
+        self.base = base
+        self.medicoes = medicoes
+        self.sessao = requests.Session()
+        self.versao = None
+        self.unidades = []
+        self.unidade = None
+        self.pagina = 0
+        self.cliques_pagina = 0
+        self.n_intervals = 0
+        self.versao_servidor = None
+
+    def _requisitar(self, tipo, metodo, caminho, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resposta = self.sessao.request(metodo, self.base + caminho, timeout=60, **kwargs)
+            ok = resposta.status_code in (200, 204)
+        except requests.RequestException:
+            resposta, ok = None, False
+        self.medicoes.registrar(tipo, (time.perf_counter() - inicio) * 1000, ok)
+        return resposta if ok else None
+
+    def _callback(self, tipo, saidas, entradas, estado=(), alterados=None):
+        resposta = self._requisitar(
+            tipo, "POST", "/_dash-update-component",
+            json=corpo_callback(saidas, entradas, estado, alterados),
+        )
+        if resposta is None or resposta.status_code == 204:
+            return None
+        # Só no_update: o Dash responde 200 com as saídas vazias
+        return resposta.json().get("response") or None
+
+    def carregar(self):
+        """Abertura da página: HTML, layout, dependências e callbacks iniciais."""
+        self._requisitar("pagina", "GET", "/")
+        self._requisitar("layout", "GET", "/_dash-layout")
+        self._requisitar("layout", "GET", "/_dash-dependencies")
+        self.tick(tipo="snapshot inicial")
+
+    def tick(self, tipo="tick", alterados=None):
+        """Um disparo do dcc.Interval (ou um aviso de versão); com versão nova,
+        tabela e gráficos refazem."""
+        resposta = self._callback(tipo, SAIDAS_PUBLICAR, [
+            ("interval-update-data", "n_intervals", self.n_intervals),
+            ("versao-servidor", "data", self.versao_servidor), ("url", "search", ""),
+        ], [("versao-dados", "data", self.versao)], alterados)
+        self.n_intervals += 1
+        if resposta is None:
+            return
+        self.versao = resposta["versao-dados"]["data"]
+        self.unidades = resposta["snapshot-dados"]["data"]["unidades"]
+        self.tabela("tabela", ["versao-dados.data"])
+        self.graficos("graficos", ["versao-dados.data"])
+
+    def tabela(self, tipo, alterados):
+        resposta = self._callback(tipo, SAIDAS_TABELA, [
+            ("versao-dados", "data", self.versao), ("filtro-tabela", "value", None),
+            ("ordenar-tabela", "value", None), ("direcao-tabela", "value", "desc"),
+            ("pagina-anterior", "n_clicks", 0), ("pagina-seguinte", "n_clicks", self.cliques_pagina),
+        ], [("pagina-tabela", "data", self.pagina)], alterados)
+        if resposta is not None:
+            self.pagina = resposta["pagina-tabela"]["data"]
+
+    def graficos(self, tipo, alterados):
+        self._callback(tipo, SAIDAS_GRAFICOS, [
+            ("versao-dados", "data", self.versao), ("unidade-evolucao", "value", self.unidade),
+        ], alterados=alterados)
+
+    def escolher_unidade(self):
+        """Gerente troca a unidade do filtro dos gráficos de evolução."""
+        if self.unidades:
+            self.unidade = random.choice(self.unidades)
+            self.graficos("dropdown", ["unidade-evolucao.value"])
+
+    def proxima_pagina(self):
+        self.cliques_pagina += 1
+        self.tabela("paginacao", ["pagina-seguinte.n_clicks"])
+
+    def ouvir_eventos(self, parar):
+        """Mantém /eventos aberto e publica a cada versão avisada.
+
+        Retorna True quando o servidor encerra a conexão (o navegador
+        reconectaria) e False se ela for recusada ou falhar.
+        """
+        inicio = time.perf_counter()
+        try:
+            canal = requests.get(self.base + "/eventos", stream=True, timeout=(5, 60))
+        except requests.RequestException:
+            self.medicoes.registrar("eventos", (time.perf_counter() - inicio) * 1000, False)
+            return False
+        ok = canal.status_code == 200
+        self.medicoes.registrar("eventos", (time.perf_counter() - inicio) * 1000, ok)
+        if not ok:
+            canal.close()
+            return False
+        evento, dado = None, None
+        try:
+            with canal:
+                for linha in canal.iter_lines(decode_unicode=True):
+                    if parar.is_set():
+                        return True
+                    if linha.startswith("event: "):
+                        evento = linha[len("event: "):]
+                    elif linha.startswith("data: "):
+                        dado = linha[len("data: "):]
+                    elif not linha and evento == "versao":
+                        if int(dado) != self.versao_servidor:
+                            self.versao_servidor = int(dado)
+                            self.tick("evento", ["versao-servidor.data"])
+                        evento, dado = None, None
+        except requests.RequestException:
+            return False
+        return True
+
+
+def executar_tv(tela, intervalo, eventos, parar):
+    tela.carregar()
+    if eventos:
+        while not parar.is_set() and tela.ouvir_eventos(parar):
+            pass
+        # Canal recusado: como o navegador, segue com o dcc.Interval
+    # As TVs não ligam juntas: cada uma começa em um ponto do intervalo
+    proximo = time.monotonic() + random.uniform(0, intervalo)
+    while not parar.wait(max(0.0, proximo - time.monotonic())):
+        tela.tick()
+        proximo += intervalo
+
+
+def executar_gerente(tela, intervalo, pensar, parar):
+    tela.carregar()
+    proximo_tick = time.monotonic() + intervalo
+    while not parar.wait(random.expovariate(1 / pensar)):
+        if time.monotonic() >= proximo_tick:
+            tela.tick()
+            proximo_tick += intervalo
+        if random.random() < 0.8:
+            tela.escolher_unidade()
+        else:
+            tela.proxima_pagina()
+
+
+def rodada(base, servidor, tvs, gerentes, args):
+    """Executa uma rodada de --duracao segundos e retorna o resumo."""
+    medicoes = Medicoes()
+    parar = threading.Event()
+    threads = [
+        threading.Thread(target=executar_tv,
+                         args=(Tela(base, medicoes), args.intervalo, args.eventos, parar))
+        for _ in range(tvs)
+    ] + [
+        threading.Thread(target=executar_gerente,
+                         args=(Tela(base, medicoes), args.intervalo, args.pensar, parar))
+        for _ in range(gerentes)
+    ]
+    servidor.zerar_contadores()
+    inicio = time.monotonic()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duracao)
+    parar.set()
+    for thread in threads:
+        thread.join()
+    duracao = time.monotonic() - inicio
+
+    ticks = duracao / args.intervalo
+    tipos = []
+    for tipo, tempos in sorted(medicoes.tempos.items()):
+        p50, p95, p99 = np.percentile(tempos, [50, 95, 99])
+        tipos.append({
+            "tipo": tipo, "n": len(tempos), "req_s": len(tempos) / duracao,
+            "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "erros": medicoes.erros.get(tipo, 0),
+        })
+    return {
+        "tvs": tvs, "gerentes": gerentes, "duracao_s": duracao,
+        "req_s": sum(t["n"] for t in tipos) / duracao,
+        "buscas": servidor.buscas, "respostas_304": servidor.respostas_304,
+        "buscas_por_tick": servidor.buscas / ticks, "tipos": tipos,
+    }
+
+
+def imprimir(resultado, intervalo):
+    print(f"\n== {resultado['tvs']} TVs + {resultado['gerentes']} gerentes, "
+          f"{resultado['duracao_s']:.0f} s: {resultado['req_s']:.1f} req/s")
+    print(f"{'tipo':<20}{'n':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>7}")
+    for t in resultado["tipos"]:
+        print(f"{t['tipo']:<20}{t['n']:>7}{t['req_s']:>9.1f}{t['p50_ms']:>10.1f}"
+              f"{t['p95_ms']:>10.1f}{t['p99_ms']:>10.1f}{t['erros']:>7}")
+    print(f"Buscas à planilha: {resultado['buscas']} ({resultado['respostas_304']} respostas 304), "
+          f"{resultado['buscas_por_tick']:.2f} por tick de {intervalo:g} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=64, help="threads por worker (gthread)")
+    parser.add_argument("--tvs", type=int, nargs="+", default=[10, 50],
+                        help="número de TVs em cada rodada")
+    parser.add_argument("--gerentes", type=int, default=5)
+    parser.add_argument("--duracao", type=float, default=30.0, help="segundos por rodada")
+    parser.add_argument("--intervalo", type=float, default=5.0,
+                        help="período do dcc.Interval simulado, em segundos")
+    parser.add_argument("--pensar", type=float, default=3.0,
+                        help="tempo médio (s) entre cliques de um gerente")
+    parser.add_argument("--ttl", type=float, default=5.0,
+                        help="CACHE_TTL_SEGUNDOS do app durante o teste")
+    parser.add_argument("--linhas", type=int, default=500)
+    parser.add_argument("--mudar-a-cada", type=float, default=15.0,
+                        help="altera a planilha a cada N segundos (0 = nunca)")
+    parser.add_argument("--eventos", action="store_true",
+                        help="as TVs mantêm /eventos aberto e só publicam nos avisos")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    servidor = iniciar_servidor(args.linhas)
+    parar_mudancas = threading.Event()
+    if args.mudar_a_cada > 0:
+        def alterar():
+            while not parar_mudancas.wait(args.mudar_a_cada):
+                servidor.mudar_dados()
+        threading.Thread(target=alterar, daemon=True).start()
+
+    diretorio = tempfile.mkdtemp(prefix="dashboard-carga-")
+    ambiente = {
+        "URL_SHEETS": servidor.url,
+        "CACHE_TTL_SEGUNDOS": str(args.ttl),
+        "DIRETORIO_DADOS": diretorio,
+    }
+    if args.eventos:
+        # Pings frequentes deixam as TVs perceberem o fim da rodada logo
+        ambiente.setdefault("INTERVALO_PING_EVENTOS_SEGUNDOS",
+                            os.environ.get("INTERVALO_PING_EVENTOS_SEGUNDOS", "2"))
+    porta = porta_livre()
+    with open(os.path.join(diretorio, "gunicorn.log"), "w") as log:
+        # Com --eventos as TVs só fazem callbacks quando os dados mudam
+        keep_alive = int(max(args.intervalo, args.mudar_a_cada if args.eventos else 0)) + 5
+        processo = iniciar_gunicorn(porta, args.workers, args.threads, keep_alive, ambiente, log)
+        print(f"gunicorn com {args.workers} workers em http://127.0.0.1:{porta} "
+              f"(log em {log.name})")
+        resultados = []
+        try:
+            for tvs in args.tvs:
+                resultado = rodada(f"http://127.0.0.1:{porta}", servidor, tvs, args.gerentes, args)
+                imprimir(resultado, args.intervalo)
+                resultados.append(resultado)
+        finally:
+            parar_mudancas.set()
+            processo.terminate()
+            try:
+                processo.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Mede o tempo entre uma alteração na planilha e o aviso em /eventos.
+
+Sobe a planilha local, importa o app com o atualizador em segundo plano e um
+TTL curto, abre o canal de eventos e altera os dados algumas vezes:
+
+    python -m benchmarks.eventos --mudancas 5 --ttl 1
+
+O atraso esperado fica entre zero e o TTL (o atualizador só percebe a mudança
+na próxima busca); os clientes não fazem nenhuma requisição entre os avisos.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.planilha_local import iniciar_servidor
+
+
+def ler_eventos(resposta):
+    """Gera (evento, dado) a partir do corpo de uma resposta text/event-stream."""
+    evento, dado = None, None
+    for bloco in resposta.response:
+        for linha in bloco.decode().splitlines():
+            if linha.startswith("event: "):
+                evento = linha[len("event: "):]
+            elif linha.startswith("data: "):
+                dado = linha[len("data: "):]
+            elif not linha and evento is not None:
+                yield evento, dado
+                evento, dado = None, None
+        if evento is not None:
+            yield evento, dado
+            evento, dado = None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=500)
+    parser.add_argument("--mudancas", type=int, default=5)
+    parser.add_argument("--ttl", type=float, default=1.0,
+                        help="CACHE_TTL_SEGUNDOS do app durante o teste")
+    args = parser.parse_args()
+
+    servidor = iniciar_servidor(args.linhas)
+    os.environ["URL_SHEETS"] = servidor.url
+    os.environ["CACHE_TTL_SEGUNDOS"] = str(args.ttl)
+    os.environ["DIRETORIO_DADOS"] = tempfile.mkdtemp(prefix="dashboard-eventos-")
+    import app as dashboard
+
+    dashboard.cache_dados.aguardar_versao(0, timeout=30)
+    cliente = dashboard.server.test_client()
+    resposta = cliente.get("/eventos", buffered=False)
+    eventos = ler_eventos(resposta)
+    _, versao = next(eventos)
+    print(f"Conectado na versão {versao}")
+
+    atrasos = []
+    for _ in range(args.mudancas):
+        servidor.mudar_dados()
+        inicio = time.perf_counter()
+        for evento, dado in eventos:
+            if evento == "versao" and dado != versao:
+                versao = dado
+                break
+        atrasos.append((time.perf_counter() - inicio) * 1000)
+        print(f"Versão {versao} avisada após {atrasos[-1]:.0f} ms")
+    resposta.close()
+
+    p50, p95 = np.percentile(atrasos, [50, 95])
+    print(f"Atraso p50 {p50:.0f} ms, p95 {p95:.0f} ms; "
+          f"buscas à planilha: {servidor.buscas} ({servidor.respostas_304} respostas 304)")
+
+
+if __name__ == "__main__":
+    main()
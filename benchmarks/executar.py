@@ -0,0 +1,201 @@
+"""Benchmark offline do dashboard, de 20 a 50 mil linhas.
+
+Sobe a planilha local (benchmarks.planilha_local) no lugar do Google Sheets e
+mede, para cada tamanho de planilha, o download/interpretação do CSV, as
+métricas derivadas, a montagem do layout, da tabela e dos rankings, e as
+requisições de callback de ponta a ponta pelo cliente de teste do Flask.
+Os callbacks HTTP são medidos sem memo (cada chamada renderiza e comprime,
+como logo após uma versão nova) e com memo (as demais telas na mesma versão).
+
+    python -m benchmarks.executar
+    python -m benchmarks.executar --linhas 20 500 --repeticoes 50 --json resultado.json
+
+Para cada etapa são reportados os percentis de latência, o pico de memória
+alocada (tracemalloc) e o tamanho da resposta em bytes.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.planilha_local import iniciar_servidor
+
+TAMANHOS_PADRAO = [20, 500, 5000, 50000]
+# A tabela completa (sem paginação) só é medida até este tamanho
+LIMITE_TABELA_COMPLETA = 5000
+
+
+def corpo_callback(outputs, inputs, state=(), alterados=None):
+    """Monta o corpo JSON de uma chamada a /_dash-update-component."""
+    def props(lista):
+        return [{"id": id_, "property": prop, "value": valor} for id_, prop, valor in lista]
+
+    saidas = [{"id": id_, "property": prop} for id_, prop in outputs]
+    if len(outputs) == 1:
+        output = f"{outputs[0][0]}.{outputs[0][1]}"
+        saidas = saidas[0]
+    else:
+        output = ".." + "...".join(f"{id_}.{prop}" for id_, prop in outputs) + ".."
+    return {
+        "output": output,
+        "outputs": saidas,
+        "inputs": props(inputs),
+        "state": props(state),
+        "changedPropIds": alterados or [f"{id_}.{prop}" for id_, prop, _ in inputs],
+    }
+
+
+def medir(funcao, repeticoes, orcamento_segundos):
+    """Executa funcao repetidas vezes; retorna (tempos em ms, pico em bytes, tamanho)."""
+    tamanho = funcao()  # aquecimento
+    tempos = []
+    inicio = time.perf_counter()
+    while len(tempos) < repeticoes:
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - t0) * 1000)
+        if len(tempos) >= 3 and time.perf_counter() - inicio > orcamento_segundos:
+            break
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempos, pico, tamanho
+
+
+def sem_memo(dashboard, funcao):
+    """Envolve funcao para medir a renderização: limpa o memo e as compressões antes de cada chamada."""
+    def medida():
+        dashboard.memo_renderizacao.limpar()
+        with dashboard._lock_compressoes:
+            dashboard._compressoes.clear()
+        return funcao()
+    return medida
+
+
+def tamanho_json(componente):
+    import plotly
+    return len(json.dumps(componente, cls=plotly.utils.PlotlyJSONEncoder).encode())
+
+
+def etapas(dashboard, cliente, url, linhas):
+    """Lista de (nome, função) medidas para uma planilha de `linhas` linhas."""
+    conteudo = dashboard.baixar_planilha(url).conteudo
+    snapshot = dashboard.cache_dados.obter_snapshot()
+    df, metricas, versao = snapshot.df, snapshot.metricas, snapshot.versao
+    pagina, *_ = dashboard.consultar_tabela(df, ordenar_por="taxa_confirmacao")
+
+    def post(corpo, headers=None):
+        resposta = cliente.post("/_dash-update-component", json=corpo, headers=headers)
+        assert resposta.status_code in (200, 204), resposta.status_code
+        return len(resposta.data)
+
+    publicar = [("versao-dados", "data"), ("snapshot-dados", "data")]
+    entradas_publicar = [
+        ("interval-update-data", "n_intervals", 1), ("versao-servidor", "data", versao),
+        ("url", "search", ""),
+    ]
+    versao_cliente = [dashboard.FONTE_PADRAO, versao]
+    tabela = [
+        ("tabela-geral-dados", "children"), ("pagina-tabela", "data"),
+        ("info-pagina-tabela", "children"),
+    ]
+    entradas_tabela = [
+        ("versao-dados", "data", versao_cliente), ("filtro-tabela", "value", None),
+        ("ordenar-tabela", "value", "taxa_confirmacao"), ("direcao-tabela", "value", "desc"),
+        ("pagina-anterior", "n_clicks", 0), ("pagina-seguinte", "n_clicks", 0),
+    ]
+
+    lista = [
+        ("download do CSV", lambda: len(dashboard.baixar_planilha(url).conteudo)),
+        ("interpretar_planilha", lambda: dashboard.interpretar_planilha(conteudo) is not None and len(conteudo)),
+        ("calcular_metricas", lambda: dashboard.calcular_metricas(df) and 0),
+        ("gerar_layout", lambda: tamanho_json(dashboard.gerar_layout())),
+        ("consultar_tabela", lambda: dashboard.consultar_tabela(df, "primavia", "taxa_confirmacao") and 0),
+        ("gerar_tabela_formatada (página)", lambda: tamanho_json(dashboard.gerar_tabela_formatada(pagina))),
+    ]
+    if linhas <= LIMITE_TABELA_COMPLETA:
+        lista.append(("gerar_tabela_formatada (completa)",
+                      lambda: tamanho_json(dashboard.gerar_tabela_formatada(df))))
+    lista += [
+        ("textos_rankings", lambda: tamanho_json(dashboard.textos_rankings(metricas))),
+        ("gerar_snapshot_cliente", lambda: tamanho_json(dashboard.gerar_snapshot_cliente(snapshot))),
+        ("HTTP /_dash-layout", lambda: len(cliente.get("/_dash-layout").data)),
+        # Sem memo: cada chamada renderiza (e comprime) de novo, como na
+        # primeira requisição depois de uma versão nova
+        ("HTTP publicar_snapshot (nova versão)", sem_memo(dashboard, lambda: post(corpo_callback(
+            publicar, entradas_publicar, [("versao-dados", "data", None)]
+        )))),
+        ("HTTP publicar_snapshot (gzip)", sem_memo(dashboard, lambda: post(corpo_callback(
+            publicar, entradas_publicar, [("versao-dados", "data", None)]
+        ), {"Accept-Encoding": "gzip"}))),
+        ("HTTP atualizar_tabela", sem_memo(dashboard, lambda: post(corpo_callback(
+            tabela, entradas_tabela, [("pagina-tabela", "data", 0)], ["ordenar-tabela.value"]
+        )))),
+        # Com memo: as demais telas na mesma versão
+        ("HTTP publicar_snapshot (memo)", lambda: post(corpo_callback(
+            publicar, entradas_publicar, [("versao-dados", "data", None)]
+        ))),
+        ("HTTP publicar_snapshot (gzip, memo)", lambda: post(corpo_callback(
+            publicar, entradas_publicar, [("versao-dados", "data", None)]
+        ), {"Accept-Encoding": "gzip"})),
+        ("HTTP atualizar_tabela (memo)", lambda: post(corpo_callback(
+            tabela, entradas_tabela, [("pagina-tabela", "data", 0)], ["ordenar-tabela.value"]
+        ))),
+        ("HTTP publicar_snapshot (sem mudança)", lambda: post(corpo_callback(
+            publicar, entradas_publicar, [("versao-dados", "data", versao_cliente)]
+        ))),
+    ]
+    return lista
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=TAMANHOS_PADRAO)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    parser.add_argument("--orcamento", type=float, default=5.0,
+                        help="tempo máximo (s) por etapa, com no mínimo 3 medições")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    servidor = iniciar_servidor()
+    # O app lê a configuração na importação: planilha local, sem atualizador
+    # em segundo plano e com o snapshot compartilhado em um diretório temporário
+    os.environ["URL_SHEETS"] = servidor.url
+    os.environ["ATUALIZADOR_ATIVO"] = "0"
+    os.environ["DIRETORIO_DADOS"] = tempfile.mkdtemp(prefix="dashboard-bench-")
+    import app as dashboard
+
+    cliente = dashboard.server.test_client()
+    resultados = []
+    print(f"{'etapa':<40}{'linhas':>8}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'pico MB':>10}{'bytes':>12}")
+    for linhas in args.linhas:
+        url = f"{servidor.url}?linhas={linhas}"
+        dashboard.cache_dados.url = url
+        dashboard.cache_dados.atualizar()
+        for nome, funcao in etapas(dashboard, cliente, url, linhas):
+            tempos, pico, tamanho = medir(funcao, args.repeticoes, args.orcamento)
+            p50, p95, p99 = np.percentile(tempos, [50, 95, 99])
+            resultado = {
+                "etapa": nome, "linhas": linhas, "n": len(tempos),
+                "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                "pico_bytes": pico, "bytes": int(tamanho or 0),
+            }
+            resultados.append(resultado)
+            print(f"{nome:<40}{linhas:>8}{len(tempos):>5}{p50:>10.2f}{p95:>10.2f}"
+                  f"{p99:>10.2f}{pico / 2**20:>10.2f}{resultado['bytes']:>12}")
+    print(f"Buscas à planilha local: {servidor.buscas} ({servidor.respostas_304} respostas 304)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Gerador de planilhas sintéticas com o mesmo cabeçalho publicado no Google Sheets."""
+import csv
+import io
+import random
+
+# Mesmo layout (e títulos repetidos) da planilha real
+CABECALHO = [
+    "NOME", "QUANTIDADE DE CONVITES", "META", "PROGRESSO DE CONVITES",
+    "CONFIRMADOS", "META DE CONFIRMADOS", "MÉDIA DE CONFIRMADOS",
+    "LIGAÇÕES EFETUADAS", "CONFIRMAÇÕES",
+    "VENDEDORES QUE ENVIARAM MAIS CONVITES", "UNIDADES", "CONVITES",
+    "VENDEDORES QUE TIVERAM MAIS CONFIRMAÇÕES", "UNIDADES", "CONVITES CONFIRMADOS",
+]
+
+CIDADES = [
+    "Fortaleza", "Recife", "Natal", "Salvador", "Teresina", "São Luís",
+    "João Pessoa", "Maceió", "Aracaju", "Juazeiro", "Sobral", "Caruaru",
+]
+
+NOMES = [
+    "Ana", "Bruno", "Carla", "Diego", "Érica", "Fábio", "Gabriela", "Hugo",
+    "Íris", "João", "Karina", "Lucas", "Marina", "Nícolas", "Otávio", "Paula",
+]
+
+def nome_unidade(i):
+    return f"Primavia {CIDADES[i % len(CIDADES)]} {i // len(CIDADES) + 1:03d}"
+
+def gerar_csv(linhas, semente=0, variacao=0):
+    """Gera o CSV (bytes) de uma planilha com `linhas` unidades.
+
+    `variacao` altera alguns valores mantendo as mesmas unidades, simulando a
+    planilha sendo editada entre uma busca e outra.
+    """
+    aleatorio = random.Random(semente * 1_000_003 + variacao)
+    unidades = [nome_unidade(i) for i in range(linhas)]
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(CABECALHO)
+    for i, unidade in enumerate(unidades):
+        meta = aleatorio.choice([800, 1000, 1200, 1500])
+        convites = aleatorio.randint(0, int(meta * 1.3))
+        confirmados = aleatorio.randint(0, convites)
+        meta_confirmados = meta // 2
+        ligacoes = aleatorio.randint(0, convites)
+        # O bloco de vendedores é uma lista à parte; nem toda linha tem vendedor
+        tem_vendedor = aleatorio.random() < 0.8
+        vendedor = f"{aleatorio.choice(NOMES)} {i:05d}" if tem_vendedor else ""
+        escritor.writerow([
+            unidade,
+            convites,
+            meta,
+            round(convites / meta, 4),
+            confirmados,
+            meta_confirmados,
+            round(confirmados / convites, 4) if convites else 0,
+            ligacoes,
+            aleatorio.randint(0, ligacoes),
+            vendedor,
+            aleatorio.choice(unidades) if tem_vendedor else "",
+            aleatorio.randint(0, 400) if tem_vendedor else "",
+            f"{aleatorio.choice(NOMES)} {aleatorio.randint(0, linhas):05d}",
+            aleatorio.choice(unidades),
+            aleatorio.randint(0, 200),
+        ])
+    return saida.getvalue().encode("utf-8")
@@ -0,0 +1,140 @@
+"""Servidor HTTP local que faz o papel do CSV publicado no Google Sheets.
+
+Uso isolado:
+
+    python -m benchmarks.planilha_local --linhas 500 --porta 8765
+    URL_SHEETS=http://127.0.0.1:8765/planilha.csv python app.py
+
+Responde com ETag/Last-Modified e 304 para requisições condicionais, como o
+Google, e conta quantas vezes a planilha foi buscada.
+"""
+import argparse
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.gerador import gerar_csv
+
+
+class ServidorPlanilha(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, linhas=500, semente=0, atraso=0.0):
+        super().__init__(endereco, HandlerPlanilha)
+        self.linhas = linhas
+        self.semente = semente
+        # Atraso artificial (em segundos) para simular o Google lento
+        self.atraso = atraso
+        self.variacao = 0
+        self.buscas = 0
+        self.respostas_304 = 0
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    @property
+    def url(self):
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}/planilha.csv"
+
+    def mudar_dados(self):
+        """Simula uma edição da planilha: a próxima busca devolve outro conteúdo."""
+        with self._lock:
+            self.variacao += 1
+
+    def conteudo(self, linhas, semente, variacao):
+        chave = (linhas, semente, variacao)
+        with self._lock:
+            if chave not in self._cache:
+                corpo = gerar_csv(linhas, semente, variacao)
+                self._cache[chave] = (
+                    corpo,
+                    '"%s"' % hashlib.sha1(corpo).hexdigest(),
+                    formatdate(time.time(), usegmt=True),
+                )
+            return self._cache[chave]
+
+    def contar(self, nao_modificado):
+        with self._lock:
+            self.buscas += 1
+            if nao_modificado:
+                self.respostas_304 += 1
+
+    def zerar_contadores(self):
+        with self._lock:
+            self.buscas = 0
+            self.respostas_304 = 0
+
+
+class HandlerPlanilha(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/planilha.csv":
+            self.send_error(404)
+            return
+        parametros = parse_qs(url.query)
+        servidor = self.server
+        corpo, etag, last_modified = servidor.conteudo(
+            int(parametros.get("linhas", [servidor.linhas])[0]),
+            int(parametros.get("semente", [servidor.semente])[0]),
+            int(parametros.get("variacao", [servidor.variacao])[0]),
+        )
+        if servidor.atraso:
+            time.sleep(servidor.atraso)
+
+        nao_modificado = self.headers.get("If-None-Match") == etag
+        servidor.contar(nao_modificado)
+        if nao_modificado:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def iniciar_servidor(linhas=500, porta=0, semente=0, atraso=0.0):
+    """Inicia o servidor em uma thread e retorna a instância (porta 0 = livre)."""
+    servidor = ServidorPlanilha(("127.0.0.1", porta), linhas, semente, atraso)
+    threading.Thread(target=servidor.serve_forever, name="planilha-local", daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=500)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--atraso", type=float, default=0.0,
+                        help="segundos de espera antes de cada resposta")
+    parser.add_argument("--mudar-a-cada", type=float, default=0.0,
+                        help="altera os dados a cada N segundos (0 = nunca)")
+    args = parser.parse_args()
+
+    servidor = ServidorPlanilha(("127.0.0.1", args.porta), args.linhas, args.semente, args.atraso)
+    print(f"Servindo {args.linhas} linhas em {servidor.url}")
+    if args.mudar_a_cada > 0:
+        def alterar():
+            while True:
+                time.sleep(args.mudar_a_cada)
+                servidor.mudar_dados()
+                print(f"Dados alterados (variação {servidor.variacao}, buscas: {servidor.buscas})")
+        threading.Thread(target=alterar, daemon=True).start()
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()